@@ -2,6 +2,7 @@
 """Bilibili Web credential persistence and cookie refresh helpers."""
 from __future__ import annotations
 
+import functools
 import html
 import gzip
 import json
@@ -35,6 +36,9 @@ COOKIE_INFO_URL = "https://passport.bilibili.com/x/passport-login/web/cookie/inf
 CORRESPOND_URL = "https://www.bilibili.com/correspond/1/{correspond_path}"
 COOKIE_REFRESH_URL = "https://passport.bilibili.com/x/passport-login/web/cookie/refresh"
 COOKIE_CONFIRM_URL = "https://passport.bilibili.com/x/passport-login/web/confirm/refresh"
+_TOML_TABLE_PATTERN = re.compile(r"^\s*\[[^\]]+\]\s*(?:#.*)?$")
+_AUTH_TABLE_PATTERN = re.compile(r"^\s*\[auth\]\s*(?:#.*)?$")
+_REFRESH_CSRF_PATTERN = re.compile(r'<div\s+id=["\']1-name["\']>([^<]+)</div>', re.IGNORECASE)
 
 PUBLIC_KEY_PEM = b"""-----BEGIN PUBLIC KEY-----
 MIGfMA0GCSqGSIb3DQEBAQUAA4GNADCBiQKBgQDLgd2OAkcGVtoE3ThUREbio0Eg
@@ -113,14 +117,12 @@ def save_auth_config(config_path: str, credentials: Dict[str, Any]) -> None:
 
     start = None
     end = None
-    table_pattern = re.compile(r"^\s*\[[^\]]+\]\s*(?:#.*)?$")
-    auth_pattern = re.compile(r"^\s*\[auth\]\s*(?:#.*)?$")
     for idx, line in enumerate(original_lines):
-        if auth_pattern.match(line):
+        if _AUTH_TABLE_PATTERN.match(line):
             start = idx
             end = len(original_lines)
             for next_idx in range(idx + 1, len(original_lines)):
-                if table_pattern.match(original_lines[next_idx]):
+                if _TOML_TABLE_PATTERN.match(original_lines[next_idx]):
                     end = next_idx
                     break
             break
@@ -134,10 +136,15 @@ def save_auth_config(config_path: str, credentials: Dict[str, Any]) -> None:
         new_lines.extend(auth_lines)
     else:
         replacement = list(auth_lines)
-        if end < len(original_lines) and (not replacement[-1].endswith("\n") or original_lines[end - 1].strip()):
+        if end < len(original_lines):
+            # 被替换区间包含原有的段间空行，始终补一行空行分隔下一个表
             replacement.append("\n")
         new_lines = original_lines[:start] + replacement + original_lines[end:]
 
+    # 内容未变化时不重写：写入 config.toml 会触发宿主重新解析配置并回调 on_config_update
+    if new_lines == original_lines:
+        return
+
     tmp_path = f"{config_path}.tmp"
     with open(tmp_path, "w", encoding="utf-8") as f:
         f.writelines(new_lines)
@@ -149,6 +156,8 @@ def extract_set_cookie_values(response_headers: Any) -> Dict[str, str]:
     try:
         if hasattr(response_headers, "get_all"):
             cookies = response_headers.get_all("Set-Cookie") or []
+        elif hasattr(response_headers, "getall"):
+            cookies = response_headers.getall("Set-Cookie", [])
         elif hasattr(response_headers, "getheaders"):
             cookies = response_headers.getheaders("Set-Cookie") or []
         else:
@@ -193,7 +202,9 @@ class BilibiliAuthRefresher:
     """Synchronous Bilibili Web cookie refresh client."""
 
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def cryptography_available() -> bool:
+        # 可选依赖探测结果在进程内不变，缓存后 on_load 与每次续期检查不再重复执行 import
         try:
             from cryptography.hazmat.primitives import hashes  # noqa: F401
             from cryptography.hazmat.primitives.asymmetric import padding  # noqa: F401
@@ -379,7 +390,7 @@ class BilibiliAuthRefresher:
         )
         with urllib.request.urlopen(req, timeout=15) as resp:  # nosec - trusted public API
             html_text = _read_response_text(resp)
-        match = re.search(r'<div\s+id=["\']1-name["\']>([^<]+)</div>', html_text, re.IGNORECASE)
+        match = _REFRESH_CSRF_PATTERN.search(html_text)
         if not match:
             raise ValueError("未能获取 refresh_csrf")
         return html.unescape(match.group(1).strip())
@@ -2,21 +2,335 @@
 """视频下载与 DASH 合并逻辑。"""
 from __future__ import annotations
 
+import base64
+import http.client
 import logging
 import os
 import subprocess
+import threading
 import time
 import urllib.parse
 import urllib.request
-from typing import Any, Dict, List, Optional
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from contextlib import suppress
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
 
 from .auth import build_cookie_header, normalize_credentials
-from .ffmpeg import ffmpeg_manager
+from .ffmpeg import FFMPEG_BATCH_ARGS, FFMPEG_BUFSIZE, VideoCompressor, get_ffmpeg_manager
 from .parser import BilibiliParser
 from .utils import ProgressBar, get_download_temp_dir, sanitize_filename
 
 _logger = logging.getLogger("plugin.bilibili_video_sender.downloader")
 
+_DOWNLOAD_TIMEOUT = 60
+_MAX_REDIRECTS = 5
+# 每个 CDN 主机保留的空闲 keep-alive 连接数；视频/音频流与后续解析复用连接，省去 TCP/TLS 握手
+_POOL_MAX_IDLE_PER_HOST = 4
+_pool_lock = threading.Lock()
+_idle_connections: Dict[Tuple[str, str], List[http.client.HTTPConnection]] = {}
+# CDN 对单条 TCP 流限速：支持 Range 且足够大的流拆成多段并发下载
+_PARALLEL_MIN_SIZE = 8 << 20
+_PARALLEL_PARTS = 4
+# 每次从响应读取的字节数：大块读取减少 Python 层循环（写文件、进度统计）次数；
+# 读取经 readinto 写入每个下载循环复用的缓冲区，不再为每块分配新的 bytes；
+# 写入块大于 BufferedWriter 缓冲区时会直接透传到底层 write，无额外拷贝
+_READ_CHUNK_SIZE = 1 << 20
+# 合并/转封装只做流拷贝，正常数秒内完成；超时视为 FFmpeg 卡死（如 HTTP 输入挂起），终止进程并释放线程池工作线程
+_FFMPEG_TIMEOUT = 600
+
+
+def _proxy_for(scheme: str, netloc: str) -> Optional[urllib.parse.SplitResult]:
+    """返回环境变量（HTTP(S)_PROXY，遵循 NO_PROXY）为该主机配置的代理，与 urlopen 行为一致；未配置时返回 None。"""
+    proxy = urllib.request.getproxies().get(scheme)
+    if not proxy or urllib.request.proxy_bypass(netloc):
+        return None
+    if "://" not in proxy:
+        proxy = f"http://{proxy}"
+    parts = urllib.parse.urlsplit(proxy)
+    return parts if parts.hostname else None
+
+
+def _proxy_auth_headers(proxy: urllib.parse.SplitResult) -> Dict[str, str]:
+    """代理 URL 带用户名时生成 Proxy-Authorization 头。"""
+    if proxy.username is None:
+        return {}
+    user_pass = f"{urllib.parse.unquote(proxy.username)}:{urllib.parse.unquote(proxy.password or '')}"
+    return {"Proxy-Authorization": "Basic " + base64.b64encode(user_pass.encode()).decode("ascii")}
+
+
+def _new_connection(
+    key: Tuple[str, str],
+    proxy: Optional[urllib.parse.SplitResult] = None,
+) -> http.client.HTTPConnection:
+    scheme, netloc = key
+    if proxy is None:
+        conn_cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return conn_cls(netloc, timeout=_DOWNLOAD_TIMEOUT)
+
+    proxy_netloc = proxy.netloc.rpartition("@")[2]
+    if scheme == "https":
+        # HTTPS 经代理 CONNECT 隧道，TLS 仍与目标主机握手
+        conn = http.client.HTTPSConnection(proxy_netloc, timeout=_DOWNLOAD_TIMEOUT)
+        conn.set_tunnel(netloc, headers=_proxy_auth_headers(proxy))
+        return conn
+    # 明文 HTTP 直接发往代理，请求行使用绝对 URL（见 _open_stream）
+    return http.client.HTTPConnection(proxy_netloc, timeout=_DOWNLOAD_TIMEOUT)
+
+
+def _acquire_connection(
+    key: Tuple[str, str],
+    proxy: Optional[urllib.parse.SplitResult] = None,
+) -> Tuple[http.client.HTTPConnection, bool]:
+    """从连接池取出空闲连接，没有时新建；返回 (连接, 是否为复用连接)。"""
+    with _pool_lock:
+        idle = _idle_connections.get(key)
+        if idle:
+            return idle.pop(), True
+    return _new_connection(key, proxy), False
+
+
+def _release_connection(key: Tuple[str, str], conn: http.client.HTTPConnection) -> None:
+    """归还已读完响应的连接；池满时直接关闭。"""
+    with _pool_lock:
+        idle = _idle_connections.setdefault(key, [])
+        if len(idle) < _POOL_MAX_IDLE_PER_HOST:
+            idle.append(conn)
+            return
+    conn.close()
+
+
+def close_download_connections() -> None:
+    """关闭连接池中的全部空闲连接（插件卸载时调用）。"""
+    with _pool_lock:
+        conns = [conn for idle in _idle_connections.values() for conn in idle]
+        _idle_connections.clear()
+    for conn in conns:
+        conn.close()
+
+
+def _open_stream(
+    url: str,
+    headers: Dict[str, str],
+) -> Tuple[Tuple[str, str], http.client.HTTPConnection, http.client.HTTPResponse]:
+    """通过连接池发起 GET 请求并跟随重定向，返回 (连接池键, 连接, 响应)。"""
+    headers = BilibiliParser._request_headers(headers)
+    for _ in range(_MAX_REDIRECTS + 1):
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        request_headers = headers
+        proxy = _proxy_for(parts.scheme, parts.netloc)
+        if proxy is not None and parts.scheme == "http":
+            path = urllib.parse.urlunsplit(parts._replace(fragment=""))
+            request_headers = {**headers, **_proxy_auth_headers(proxy)}
+
+        conn, reused = _acquire_connection(key, proxy)
+        try:
+            conn.request("GET", path, headers=request_headers)
+            resp = conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            if not reused:
+                raise
+            # 空闲连接可能已被服务端关闭，换新连接重试一次
+            conn = _new_connection(key, proxy)
+            try:
+                conn.request("GET", path, headers=request_headers)
+                resp = conn.getresponse()
+            except BaseException:
+                conn.close()
+                raise
+
+        if resp.status in (301, 302, 303, 307, 308):
+            location = resp.getheader("Location")
+            resp.read()
+            if resp.will_close:
+                conn.close()
+            else:
+                _release_connection(key, conn)
+            if not location:
+                raise IOError(f"HTTP {resp.status} 缺少 Location")
+            url = urllib.parse.urljoin(url, location)
+            continue
+
+        if resp.status >= 400:
+            conn.close()
+            raise IOError(f"HTTP Error {resp.status}: {resp.reason}")
+        return key, conn, resp
+
+    raise IOError("重定向次数过多")
+
+
+def _content_range_total(resp: http.client.HTTPResponse) -> int:
+    """从 206 响应的 ``Content-Range: bytes a-b/total`` 中取出文件总大小，无法解析时返回 0。"""
+    content_range = resp.getheader("Content-Range") or ""
+    _, _, total = content_range.rpartition("/")
+    return int(total) if total.isdigit() else 0
+
+
+def _split_ranges(total: int, parts: int) -> List[Tuple[int, int]]:
+    """把 [0, total) 均分为 parts 段闭区间 (start, end)。"""
+    step = -(-total // parts)
+    return [(start, min(start + step, total) - 1) for start in range(0, total, step)]
+
+
+def _copy_range(
+    resp: http.client.HTTPResponse,
+    f: BinaryIO,
+    length: int,
+    on_progress: Callable[[int], None],
+    stop: threading.Event,
+) -> None:
+    """从响应中恰好读取 length 字节写入 f；提前结束或被取消时抛出异常。"""
+    buf = memoryview(bytearray(_READ_CHUNK_SIZE))
+    remaining = length
+    while remaining > 0:
+        if stop.is_set():
+            raise IOError("分段下载已取消")
+        n = resp.readinto(buf[:remaining] if remaining < _READ_CHUNK_SIZE else buf)
+        if not n:
+            raise IOError(f"分段下载不完整: 剩余 {remaining} 字节")
+        f.write(buf[:n])
+        remaining -= n
+        on_progress(n)
+
+
+def _fetch_range(
+    url: str,
+    headers: Dict[str, str],
+    save_path: str,
+    start: int,
+    end: int,
+    on_progress: Callable[[int], None],
+    stop: threading.Event,
+) -> None:
+    """在线程池中下载 [start, end] 字节段并写入文件对应偏移。"""
+    pool_key, conn, resp = _open_stream(url, {**headers, "Range": f"bytes={start}-{end}"})
+    reusable = False
+    try:
+        content_range = resp.getheader("Content-Range") or ""
+        if resp.status != 206 or not content_range.startswith(f"bytes {start}-{end}/"):
+            raise IOError(f"分段响应不匹配: HTTP {resp.status}, {content_range!r}")
+        with open(save_path, "r+b") as f:
+            f.seek(start)
+            _copy_range(resp, f, end - start + 1, on_progress, stop)
+        reusable = not resp.will_close
+    finally:
+        if reusable:
+            _release_connection(pool_key, conn)
+        else:
+            conn.close()
+
+
+def _download_ranges(
+    url: str,
+    headers: Dict[str, str],
+    save_path: str,
+    first_resp: http.client.HTTPResponse,
+    total: int,
+    progress_bar: ProgressBar,
+) -> int:
+    """多段并发下载：首段直接读取已建立的 bytes=0- 响应，其余各段在线程池中各自发起 Range 请求。"""
+    ranges = _split_ranges(total, _PARALLEL_PARTS)
+    with open(save_path, "wb") as f:
+        f.truncate(total)
+
+    downloaded = 0
+    counter_lock = threading.Lock()
+    stop = threading.Event()
+
+    def on_progress(n: int) -> None:
+        nonlocal downloaded
+        with counter_lock:
+            downloaded += n
+
+    def on_first_progress(n: int) -> None:
+        # 进度条只在当前线程绘制
+        on_progress(n)
+        progress_bar.update(downloaded)
+
+    def fetch(start: int, end: int) -> None:
+        try:
+            _fetch_range(url, headers, save_path, start, end, on_progress, stop)
+        except BaseException:
+            # 任一分段失败（如服务端返回 200 而非 206）立即通知首段与其他分段停止
+            stop.set()
+            raise
+
+    with ThreadPoolExecutor(max_workers=len(ranges) - 1, thread_name_prefix="bili_range") as pool:
+        futures = [pool.submit(fetch, start, end) for start, end in ranges[1:]]
+        try:
+            try:
+                with open(save_path, "r+b") as f:
+                    _copy_range(first_resp, f, ranges[0][1] + 1, on_first_progress, stop)
+            except IOError:
+                if not stop.is_set():
+                    raise
+                # 首段因其他分段失败而中止：交给下方等待循环抛出该分段的原始错误
+            pending = futures
+            while pending:
+                done, pending = wait(pending, timeout=0.2, return_when=FIRST_EXCEPTION)
+                progress_bar.update(downloaded)
+                for future in done:
+                    future.result()
+        except BaseException:
+            stop.set()
+            raise
+
+    return downloaded
+
+
+class _RangeDownloadError(IOError):
+    """分段并发下载失败（服务端 Range 支持不完整等），可退回单连接下载。"""
+
+
+def _download_url(
+    url: str,
+    save_path: str,
+    label: str,
+    headers: Dict[str, str],
+    allow_parallel: bool = True,
+) -> None:
+    """从单个 URL 下载到 save_path，失败时抛出异常。"""
+    pool_key, conn, resp = _open_stream(url, headers)
+    reusable = False
+    try:
+        total_size = resp.getheader("content-length")
+        total_size = int(total_size) if total_size else 0
+
+        progress_bar = ProgressBar(total_size, label, 30)
+        range_total = _content_range_total(resp) if allow_parallel and resp.status == 206 else 0
+        if range_total >= _PARALLEL_MIN_SIZE and range_total == total_size:
+            # 首个响应未读完即关闭，连接不归还连接池
+            try:
+                downloaded = _download_ranges(url, headers, save_path, resp, range_total, progress_bar)
+            except Exception as e:
+                raise _RangeDownloadError(str(e)) from e
+        else:
+            buf = memoryview(bytearray(_READ_CHUNK_SIZE))
+            with open(save_path, "wb") as f:
+                downloaded = 0
+                while True:
+                    n = resp.readinto(buf)
+                    if not n:
+                        break
+                    f.write(buf[:n])
+                    downloaded += n
+                    progress_bar.update(downloaded)
+            # 响应体已读完且服务端未要求关闭时，连接可交回连接池
+            reusable = not resp.will_close
+
+        progress_bar.finish()
+        if total_size > 0 and downloaded < total_size:
+            raise IOError(f"下载不完整: {downloaded}/{total_size}")
+    finally:
+        if reusable:
+            _release_connection(pool_key, conn)
+        else:
+            conn.close()
+
 
 def _download_stream(
     url_list: List[str],
@@ -29,126 +343,87 @@ def _download_stream(
         return False
     last_err = None
     for idx, url in enumerate(url_list, start=1):
+        label = f"{desc} (候选{idx}/{len(url_list)})"
         try:
-            req = BilibiliParser._build_request(url, headers)
-            with urllib.request.urlopen(req, timeout=60) as resp:  # nosec
-                total_size = resp.headers.get("content-length")
-                total_size = int(total_size) if total_size else 0
-
-                progress_bar = ProgressBar(total_size, f"{desc} (候选{idx}/{len(url_list)})", 30)
-                with open(save_path, "wb") as f:
-                    downloaded = 0
-                    while True:
-                        chunk = resp.read(1024 * 256)
-                        if not chunk:
-                            break
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        progress_bar.update(downloaded)
-
-                progress_bar.finish()
-                if total_size > 0 and downloaded < total_size:
-                    raise IOError(f"下载不完整: {downloaded}/{total_size}")
+            try:
+                _download_url(url, save_path, label, headers)
+            except _RangeDownloadError as e:
+                _logger.warning("%s 第 %d 条链接分段下载失败，改用单连接下载: %s", desc, idx, e)
+                _download_url(url, save_path, label, headers, allow_parallel=False)
             return True
         except Exception as e:
             last_err = e
             _logger.warning("%s 第 %d 条链接下载失败: %s", desc, idx, e)
-            try:
-                if os.path.exists(save_path):
-                    os.remove(save_path)
-            except Exception:
-                pass
+            _remove_files(save_path)
     if last_err:
         _logger.error("%s 所有链接下载失败: %s", desc, last_err)
     return False
 
 
+def _remove_files(*paths: Optional[str]) -> None:
+    """删除临时文件；路径为空或文件不存在时忽略。"""
+    for path in paths:
+        if path:
+            with suppress(OSError):
+                os.remove(path)
+
+
+def _run_ffmpeg(cmd: List[str]) -> subprocess.CompletedProcess:
+    """执行一次 FFmpeg 批处理命令：stdout 丢弃，只收集 stderr（配合 FFMPEG_BATCH_ARGS 仅含错误信息）。"""
+    return subprocess.run(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        bufsize=FFMPEG_BUFSIZE,
+        timeout=_FFMPEG_TIMEOUT,
+    )
+
+
 def _merge_dash_video_audio(
     video_temp: str,
     audio_temp: Optional[str],
     output_path: str,
     ffmpeg_path: str,
 ) -> bool:
-    """使用 FFmpeg 合并 DASH 视频和音频流。"""
+    """使用 FFmpeg 合并 download_video 下载的 DASH 视频/音频分段（.m4s）。"""
     try:
-        ffprobe_path = ffmpeg_manager.get_ffprobe_path()
-        video_format = "unknown"
-        if ffprobe_path:
-            probe_cmd = [
-                ffprobe_path,
-                "-v", "error",
-                "-show_entries", "format=format_name",
-                "-of", "default=noprint_wrappers=1:nokey=1",
-                video_temp,
-            ]
-            try:
-                video_format = (
-                    subprocess.run(probe_cmd, capture_output=True, text=False)
-                    .stdout.decode("utf-8", errors="replace")
-                    .strip()
-                )
-            except Exception as e:
-                _logger.warning("Unable to check video format: %s", e)
-
         has_audio = audio_temp and os.path.exists(audio_temp)
 
-        if "m4s" in video_format.lower() or video_temp.lower().endswith(".m4s"):
-            if has_audio:
-                ffmpeg_cmd = [
-                    ffmpeg_path,
-                    "-i", video_temp,
-                    "-i", audio_temp,
-                    "-c:v", "copy",
-                    "-c:a", "aac",
-                    "-strict", "experimental",
-                    "-b:a", "192k",
-                    "-y", output_path,
-                ]
-            else:
-                ffmpeg_cmd = [ffmpeg_path, "-i", video_temp, "-c:v", "copy", "-y", output_path]
+        # DASH 分段固定由 download_video 以小写 .m4s 命名（ffprobe 对其报告的格式名为 "mov,mp4,..."，
+        # 从不包含 "m4s"），因此不再启动 ffprobe 探测格式：视频流拷贝，音频统一转码为 AAC
+        if has_audio:
+            ffmpeg_cmd = [
+                ffmpeg_path,
+                *FFMPEG_BATCH_ARGS,
+                "-i", video_temp,
+                "-i", audio_temp,
+                "-c:v", "copy",
+                "-c:a", "aac",
+                "-strict", "experimental",
+                "-b:a", "192k",
+                "-y", output_path,
+            ]
         else:
-            if has_audio:
-                ffmpeg_cmd = [
-                    ffmpeg_path,
-                    "-i", video_temp,
-                    "-i", audio_temp,
-                    "-c:v", "copy",
-                    "-c:a", "copy",
-                    "-y", output_path,
-                ]
-            else:
-                ffmpeg_cmd = [ffmpeg_path, "-i", video_temp, "-c:v", "copy", "-y", output_path]
+            ffmpeg_cmd = [ffmpeg_path, *FFMPEG_BATCH_ARGS, "-i", video_temp, "-c:v", "copy", "-y", output_path]
 
         _logger.debug("Starting to merge video and audio...")
-        result = subprocess.run(ffmpeg_cmd, capture_output=True, text=False)
+        result = _run_ffmpeg(ffmpeg_cmd)
         if result.returncode == 0:
             _logger.debug("Video and audio merged successfully")
             # 清理临时文件
-            try:
-                if os.path.exists(video_temp):
-                    os.remove(video_temp)
-                if has_audio:
-                    os.remove(audio_temp)
-                _logger.debug("Temporary files cleaned")
-            except Exception as e:
-                _logger.warning("Failed to clean temp: %s", e)
+            _remove_files(video_temp, audio_temp)
             return True
 
         stderr_text = result.stderr.decode("utf-8", errors="replace") if result.stderr else ""
         _logger.warning("FFmpeg merge failed: %s", stderr_text)
 
         # 合并失败时退化为仅视频转封装
-        fallback_cmd = [ffmpeg_path, "-i", video_temp, "-c", "copy", "-y", output_path]
-        fallback_result = subprocess.run(fallback_cmd, capture_output=True, text=False)
+        fallback_cmd = [ffmpeg_path, *FFMPEG_BATCH_ARGS, "-i", video_temp, "-c", "copy", "-y", output_path]
+        fallback_result = _run_ffmpeg(fallback_cmd)
         if fallback_result.returncode == 0:
             _logger.warning("Audio merge failed, fallback to video-only mp4")
-            try:
-                if os.path.exists(video_temp):
-                    os.remove(video_temp)
-                if has_audio:
-                    os.remove(audio_temp)
-            except Exception:
-                pass
+            _remove_files(video_temp, audio_temp)
             return True
 
         fallback_err = fallback_result.stderr.decode("utf-8", errors="replace") if fallback_result.stderr else ""
@@ -159,16 +434,60 @@ def _merge_dash_video_audio(
         return False
 
 
+def _merge_dash_from_http(
+    video_url: str,
+    audio_url: Optional[str],
+    output_path: str,
+    ffmpeg_path: str,
+    headers: Dict[str, str],
+) -> bool:
+    """让 FFmpeg 直接从 CDN 读取 DASH 视频/音频流并合并，省去 m4s 临时文件的写入与回读。"""
+    # FFmpeg 的 -headers 需要以 CRLF 结尾的原始头部文本；Range/Accept-Encoding 由其自行处理
+    header_blob = "".join(
+        f"{key}: {value}\r\n"
+        for key, value in headers.items()
+        if key in ("Referer", "Origin", "Cookie")
+    )
+    input_args = [
+        "-user_agent", headers.get("User-Agent", BilibiliParser.USER_AGENT),
+        "-headers", header_blob,
+        "-rw_timeout", str(_DOWNLOAD_TIMEOUT * 1_000_000),
+    ]
+    ffmpeg_cmd = [ffmpeg_path, *FFMPEG_BATCH_ARGS, *input_args, "-i", video_url]
+    if audio_url:
+        ffmpeg_cmd += [*input_args, "-i", audio_url, "-c:v", "copy", "-c:a", "aac", "-b:a", "192k"]
+    else:
+        ffmpeg_cmd += ["-c:v", "copy"]
+    ffmpeg_cmd += ["-y", output_path]
+
+    _logger.debug("Merging DASH streams directly from HTTP...")
+    try:
+        result = _run_ffmpeg(ffmpeg_cmd)
+    except Exception as e:
+        _logger.warning("FFmpeg HTTP merge failed: %s", e)
+        result = None
+    if result is not None and result.returncode == 0:
+        _logger.debug("DASH streams merged from HTTP successfully")
+        return True
+
+    if result is not None:
+        stderr_text = result.stderr.decode("utf-8", errors="replace") if result.stderr else ""
+        _logger.warning("FFmpeg HTTP merge failed, falling back to download: %s", stderr_text[-2000:])
+    _remove_files(output_path)
+    return False
+
+
 def _remux_to_mp4(input_path: str, output_path: str, ffmpeg_path: str) -> bool:
     """使用 FFmpeg 转封装为 mp4。"""
-    remux_cmd = [ffmpeg_path, "-i", input_path, "-c", "copy", "-y", output_path]
-    remux_result = subprocess.run(remux_cmd, capture_output=True, text=False)
+    remux_cmd = [ffmpeg_path, *FFMPEG_BATCH_ARGS, "-i", input_path, "-c", "copy", "-y", output_path]
+    try:
+        remux_result = _run_ffmpeg(remux_cmd)
+    except subprocess.TimeoutExpired:
+        _logger.warning("Single file remux timed out after %ds", _FFMPEG_TIMEOUT)
+        return False
     if remux_result.returncode == 0:
         _logger.debug("Single file remuxed to mp4")
-        try:
-            os.remove(input_path)
-        except Exception:
-            pass
+        _remove_files(input_path)
         return True
 
     stderr_text = remux_result.stderr.decode("utf-8", errors="replace") if remux_result.stderr else ""
@@ -176,16 +495,53 @@ def _remux_to_mp4(input_path: str, output_path: str, ffmpeg_path: str) -> bool:
     return False
 
 
+def _compress_dash_segments(
+    compressor: VideoCompressor,
+    video_temp: str,
+    audio_temp: Optional[str],
+    output_path: str,
+    max_size_mb: int,
+    quality: int,
+) -> bool:
+    """分段总大小超限时直接从视频/音频分段压缩输出 mp4，成功后删除分段；未超限或失败返回 False。"""
+    try:
+        total_size = os.path.getsize(video_temp)
+        if audio_temp:
+            total_size += os.path.getsize(audio_temp)
+    except OSError:
+        return False
+    if total_size <= max_size_mb * 1024 * 1024:
+        return False
+
+    _logger.debug("DASH segments exceed %dMB, compressing directly from segments", max_size_mb)
+    if compressor.compress_video(video_temp, output_path, max_size_mb, quality, audio_path=audio_temp):
+        _remove_files(video_temp, audio_temp)
+        return True
+
+    _logger.warning("Compressing from DASH segments failed, falling back to merge")
+    _remove_files(output_path)
+    return False
+
+
 def download_video(
     info: Any,  # BilibiliVideoInfo
     sources: Dict[str, Any],
     credentials: Dict[str, Any] | str,
     linux_temp_dir: str = "",
-) -> Optional[str]:
+    ffmpeg_http_input: bool = False,
+    compressor: Optional[VideoCompressor] = None,
+    max_size_mb: int = 0,
+    quality: int = 23,
+) -> Tuple[Optional[str], bool]:
     """下载视频并合并为 mp4 文件（阻塞函数，应在线程池中运行）。
 
+    Args:
+        ffmpeg_http_input: DASH 格式时先尝试让 FFmpeg 直接读取 HTTP 流合并，失败再回退到先下载后合并。
+        compressor: 提供时，DASH 分段总大小超过 max_size_mb 则直接由分段压缩输出，
+            省去先合并出完整 mp4 再读回压缩的一轮磁盘读写。
+
     Returns:
-        临时文件路径，失败返回 None。
+        (临时文件路径, 是否已压缩)，失败时路径为 None。
     """
     try:
         safe_title = sanitize_filename(info.title)
@@ -194,7 +550,9 @@ def download_video(
         tmp_dir = get_download_temp_dir(linux_temp_dir)
         os.makedirs(tmp_dir, exist_ok=True)
 
-        temp_path = os.path.join(tmp_dir, f"{base_name}.mp4")
+        # 本次下载涉及的所有临时文件共用同一前缀，只拼接一次目录
+        base_path = os.path.join(tmp_dir, base_name)
+        temp_path = f"{base_path}.mp4"
 
         _logger.debug("Preparing download: title=%s, temp=%s", info.title, temp_path)
 
@@ -227,68 +585,82 @@ def download_video(
 
             _logger.debug("DASH format assumed: video_urls=%d, audio_urls=%d", len(video_urls), len(audio_urls))
 
-            video_temp = os.path.join(tmp_dir, f"{base_name}_video.m4s")
-            if not _download_stream(video_urls, video_temp, "Video stream downloading", headers):
-                return None
+            ffmpeg_path = get_ffmpeg_manager().get_ffmpeg_path()
+            if ffmpeg_http_input and video_urls:
+                if ffmpeg_path and _merge_dash_from_http(
+                    video_urls[0],
+                    audio_urls[0] if audio_urls else None,
+                    temp_path,
+                    ffmpeg_path,
+                    headers,
+                ):
+                    return temp_path, False
+
+            video_temp = f"{base_path}_video.m4s"
+            audio_temp: Optional[str] = f"{base_path}_audio.m4s" if audio_urls else None
+
+            # 音频流在独立线程中与视频流同时下载，总耗时取决于较慢的一路而非两者之和
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="bili_audio") as pool:
+                audio_future = (
+                    pool.submit(_download_stream, audio_urls, audio_temp, "Audio stream downloading", headers)
+                    if audio_temp
+                    else None
+                )
+                video_ok = _download_stream(video_urls, video_temp, "Video stream downloading", headers)
+                audio_ok = audio_future.result() if audio_future is not None else False
 
-            audio_temp: Optional[str] = None
-            if audio_urls:
-                audio_temp = os.path.join(tmp_dir, f"{base_name}_audio.m4s")
-                if not _download_stream(audio_urls, audio_temp, "Audio stream downloading", headers):
-                    _logger.warning("Audio stream download failed, continue with video only")
-                    audio_temp = None
+            if not video_ok:
+                if audio_ok:
+                    _remove_files(audio_temp)
+                return None, False
+
+            if audio_temp and not audio_ok:
+                _logger.warning("Audio stream download failed, continue with video only")
+                audio_temp = None
+
+            if compressor is not None and max_size_mb > 0:
+                if _compress_dash_segments(compressor, video_temp, audio_temp, temp_path, max_size_mb, quality):
+                    return temp_path, True
 
-            ffmpeg_path = ffmpeg_manager.get_ffmpeg_path()
             if ffmpeg_path:
                 _logger.debug("Using FFmpeg: %s", ffmpeg_path)
                 if _merge_dash_video_audio(video_temp, audio_temp, temp_path, ffmpeg_path):
-                    return temp_path
+                    return temp_path, False
             else:
                 _logger.warning("FFmpeg not found, cannot merge video and audio")
 
             # 清理失败时的临时文件
             _logger.warning("DASH 合并失败且无法转封装，放弃发送 m4s")
-            if audio_temp and os.path.exists(audio_temp):
-                try:
-                    os.remove(audio_temp)
-                except Exception:
-                    pass
-            if os.path.exists(video_temp):
-                try:
-                    os.remove(video_temp)
-                except Exception:
-                    pass
-            return None
+            _remove_files(audio_temp, video_temp)
+            return None, False
 
         # durl 格式
         if source_type == "durl":
             url_list = sources.get("urls") or []
             if not url_list:
-                return None
+                return None, False
             parsed_path = urllib.parse.urlparse(url_list[0]).path
             ext = os.path.splitext(parsed_path)[1].lower()
-            download_path = temp_path
-            if ext and ext != ".mp4":
-                download_path = os.path.join(tmp_dir, f"{base_name}{ext}")
+            needs_remux = bool(ext) and ext != ".mp4"
+            download_path = f"{base_path}{ext}" if needs_remux else temp_path
 
             _logger.debug("Single file download: path=%s", download_path)
             if not _download_stream(url_list, download_path, "Video downloading", headers):
-                return None
+                return None, False
 
             final_path = download_path
-            if ext and ext != ".mp4":
-                ffmpeg_path = ffmpeg_manager.get_ffmpeg_path()
+            if needs_remux:
+                ffmpeg_path = get_ffmpeg_manager().get_ffmpeg_path()
                 if ffmpeg_path:
-                    remux_path = os.path.join(tmp_dir, f"{base_name}.mp4")
-                    if _remux_to_mp4(download_path, remux_path, ffmpeg_path):
-                        final_path = remux_path
+                    if _remux_to_mp4(download_path, temp_path, ffmpeg_path):
+                        final_path = temp_path
                 else:
                     _logger.debug("FFmpeg not found, skipping remux")
 
-            return final_path
+            return final_path, False
 
         _logger.debug("No supported streams found for download")
-        return None
+        return None, False
     except Exception as e:
         _logger.error("Failed to download video: %s", e)
-        return None
+        return None, False
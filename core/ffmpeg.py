@@ -2,60 +2,137 @@
 """跨平台 FFmpeg 管理与视频压缩。"""
 from __future__ import annotations
 
+import asyncio
+import functools
+import json
 import logging
 import os
 import platform
 import shutil
 import subprocess
-from typing import Any, Dict, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
 
 from .utils import get_plugin_root_dir
 
 _logger = logging.getLogger("plugin.bilibili_video_sender.ffmpeg")
 
+# 硬件编码器检测结果的持久化缓存文件（位于插件根目录，跨进程重启复用）
+_CAPABILITY_CACHE_FILE = ".ffmpeg_cap_cache.json"
+# 缓存内容格式版本；检测结果新增字段或检测方式变化时递增，使旧缓存自动失效
+_CAPABILITY_CACHE_VERSION = 3
+# 硬件编码失败时 stderr 中表示设备/驱动不可用的信息（小写匹配）；其他失败可能只与输入有关，不据此停用编码器
+_HW_DEVICE_ERROR_MARKERS = (
+    "no nvenc capable devices",
+    "cannot load",
+    "openencodesessionex failed",
+    "failed to initialise vaapi",
+    "error creating a mfx session",
+    "error initializing an internal mfx session",
+    "device creation failed",
+    "failed to create hardware device",
+    "amfrt64.dll failed to open",
+)
+# 长时间运行的 ffmpeg 进程（转码/合并）的管道缓冲区大小；stderr 日志可能很长，
+# 大缓冲可减少 read 系统调用次数。新增的 Popen/asyncio 子进程也应沿用（asyncio 用 limit=）
+FFMPEG_BUFSIZE = 1 << 20
+# 批处理调用的全局参数：不读 stdin、不输出横幅与逐帧进度，stderr 只保留错误信息，
+# 成功时管道几乎无数据，失败时错误信息仍可用于日志
+FFMPEG_BATCH_ARGS = ("-hide_banner", "-nostdin", "-nostats", "-loglevel", "error")
+
+
+class HardwareEncoder(NamedTuple):
+    """待检测的硬件编码器描述。"""
+
+    name: str
+    type: str
+    codec: str
+    description: str
+
+
+_ENCODERS_TO_CHECK = (
+    HardwareEncoder("h264_nvenc", "nvidia", "h264", "NVIDIA H.264硬件编码"),
+    HardwareEncoder("hevc_nvenc", "nvidia", "h265", "NVIDIA H.265硬件编码"),
+    HardwareEncoder("h264_qsv", "intel", "h264", "Intel QSV H.264硬件编码"),
+    HardwareEncoder("hevc_qsv", "intel", "h265", "Intel QSV H.265硬件编码"),
+    HardwareEncoder("h264_amf", "amd", "h264", "AMD H.264硬件编码"),
+    HardwareEncoder("hevc_amf", "amd", "h265", "AMD H.265硬件编码"),
+    HardwareEncoder("h264_videotoolbox", "apple", "h264", "Apple H.264硬件编码"),
+    HardwareEncoder("hevc_videotoolbox", "apple", "h265", "Apple H.265硬件编码"),
+)
+
+# 压缩参数模板：(编码器名子串, 质量参数名, 其余视频参数)，按顺序匹配；未命中时使用 libx264
+_ENCODER_ARG_PROFILES = (
+    # NVENC 需配合 -rc vbr -b:v 0，-cq 才不受默认码率上限约束；HEVC 没有 high profile
+    ("hevc_nvenc", ("-cq",), ("-preset", "p4", "-tune", "ll", "-rc", "vbr", "-b:v", "0", "-profile:v", "main")),
+    ("nvenc", ("-cq",), ("-preset", "p4", "-tune", "ll", "-rc", "vbr", "-b:v", "0", "-profile:v", "high")),
+    ("qsv", ("-global_quality",), ("-preset", "medium")),
+    ("amf", ("-qp_i", "-qp_p"), ("-quality", "balanced")),
+    ("videotoolbox", ("-q:v",), ("-allow_sw", "1")),
+)
+# 不支持 -q:v 的 VideoToolbox（Intel Mac 及较旧的 ffmpeg）改用码率控制
+_VIDEOTOOLBOX_BITRATE_FLAGS = ("-b:v",)
+_LIBX264_ARG_PROFILE = (("-crf",), ("-preset", "medium"))
+_AUDIO_ARGS = ("-c:a", "aac", "-b:a", "128k")
+
+
+# 进程生命周期内不变的路径与平台信息
+_PLUGIN_DIR = get_plugin_root_dir()
+_SYSTEM = platform.system().lower()
+_FFMPEG_DIR = os.path.join(_PLUGIN_DIR, "ffmpeg")
+
+
+@functools.lru_cache(maxsize=8)
+def _get_executable_path(executable_name: str, system: str, ffmpeg_dir: str) -> Optional[str]:
+    """根据操作系统获取可执行文件路径（进程内缓存，避免重复 stat/PATH 查找）。"""
+    if system == "windows":
+        bin_dir = os.path.join(ffmpeg_dir, "bin")
+        executable_path = os.path.join(bin_dir, f"{executable_name}.exe")
+    elif system in ("linux", "darwin"):
+        platform_bin_dir = os.path.join(ffmpeg_dir, "bin", system)
+        executable_path = os.path.join(platform_bin_dir, executable_name)
+        if not os.path.exists(executable_path):
+            bin_dir = os.path.join(ffmpeg_dir, "bin")
+            executable_path = os.path.join(bin_dir, executable_name)
+    else:
+        _logger.warning("不支持的操作系统: %s", system)
+        return None
+
+    if os.path.exists(executable_path):
+        _logger.debug("Found bundled %s: %s", executable_name, executable_path)
+        return executable_path
+
+    system_executable = shutil.which(executable_name)
+    if system_executable:
+        _logger.debug("Found system %s: %s", executable_name, system_executable)
+        return system_executable
+
+    _logger.warning("未找到 %s 可执行文件", executable_name)
+    return None
+
 
 class FFmpegManager:
     """跨平台 FFmpeg 管理器。"""
 
     def __init__(self):
-        self.plugin_dir = get_plugin_root_dir()
-        self.system = platform.system().lower()
-        self.ffmpeg_dir = os.path.join(self.plugin_dir, "ffmpeg")
+        self.plugin_dir = _PLUGIN_DIR
+        self.system = _SYSTEM
+        self.ffmpeg_dir = _FFMPEG_DIR
+        self.capability_cache_path = os.path.join(_PLUGIN_DIR, _CAPABILITY_CACHE_FILE)
+        # 首次检测可能由多个线程池任务并发触发，加锁保证只探测一次（可重入：可用性检测内部会调用编码器检测）
+        self._detect_lock = threading.RLock()
+        self._encoder_choice_cache: Dict[Tuple[str, ...], str] = {}
+        # 探测通过但实际压缩失败的编码器（如发行版 FFmpeg 编译了 nvenc/qsv 却没有对应硬件），本进程内不再选用
+        self._failed_encoders: Set[str] = set()
 
     def get_ffmpeg_path(self) -> Optional[str]:
         """获取 ffmpeg 可执行文件路径。"""
-        return self._get_executable_path("ffmpeg")
+        return _get_executable_path("ffmpeg", self.system, self.ffmpeg_dir)
 
     def get_ffprobe_path(self) -> Optional[str]:
         """获取 ffprobe 可执行文件路径。"""
-        return self._get_executable_path("ffprobe")
-
-    def _get_executable_path(self, executable_name: str) -> Optional[str]:
-        """根据操作系统获取可执行文件路径。"""
-        if self.system == "windows":
-            bin_dir = os.path.join(self.ffmpeg_dir, "bin")
-            executable_path = os.path.join(bin_dir, f"{executable_name}.exe")
-        elif self.system in ("linux", "darwin"):
-            platform_bin_dir = os.path.join(self.ffmpeg_dir, "bin", self.system)
-            executable_path = os.path.join(platform_bin_dir, executable_name)
-            if not os.path.exists(executable_path):
-                bin_dir = os.path.join(self.ffmpeg_dir, "bin")
-                executable_path = os.path.join(bin_dir, executable_name)
-        else:
-            _logger.warning("不支持的操作系统: %s", self.system)
-            return None
-
-        if os.path.exists(executable_path):
-            _logger.debug("Found bundled %s: %s", executable_name, executable_path)
-            return executable_path
-
-        system_executable = shutil.which(executable_name)
-        if system_executable:
-            _logger.debug("Found system %s: %s", executable_name, system_executable)
-            return system_executable
-
-        _logger.warning("未找到 %s 可执行文件", executable_name)
-        return None
+        return _get_executable_path("ffprobe", self.system, self.ffmpeg_dir)
 
     _cached_check_result: Optional[Dict[str, Any]] = None
 
@@ -63,37 +140,71 @@ class FFmpegManager:
         """检测可用的硬件编码器（带缓存）。"""
         if self._cached_check_result is not None:
             return self._cached_check_result
-
+        with self._detect_lock:
+            if self._cached_check_result is not None:
+                return self._cached_check_result
+            return self._detect_hardware_encoders()
+
+    def select_encoder(self, priority_list: Tuple[str, ...]) -> str:
+        """按厂商优先级从检测结果中选出 H.264 编码器（结果按优先级缓存）。"""
+        choice = self._encoder_choice_cache.get(priority_list)
+        if choice is not None:
+            return choice
+
+        with self._detect_lock:
+            available_encoders = self.check_hardware_encoders().get("available_encoders", [])
+            h264_encoders = [
+                encoder
+                for encoder in available_encoders
+                if encoder["codec"] == "h264" and encoder["name"] not in self._failed_encoders
+            ]
+            # 厂商 → 优先级序号；未列入优先级的厂商排在最后，同级按检测顺序（min 取首个最小值）
+            rank = {encoder_type: index for index, encoder_type in reversed(list(enumerate(priority_list)))}
+            unranked = len(priority_list)
+            choice = "libx264"
+            if h264_encoders:
+                choice = min(h264_encoders, key=lambda encoder: rank.get(encoder["type"], unranked))["name"]
+
+            self._encoder_choice_cache[priority_list] = choice
+        return choice
+
+    def mark_encoder_failed(self, encoder_name: str) -> None:
+        """记录因设备/驱动不可用而压缩失败的硬件编码器，本进程内 select_encoder 跳过它并重新选择（不写入持久化缓存）。"""
+        with self._detect_lock:
+            self._failed_encoders.add(encoder_name)
+            self._encoder_choice_cache.clear()
+
+    def _detect_hardware_encoders(self) -> Dict[str, Any]:
+        """实际执行编码器检测（调用方已持有检测锁）。"""
         ffmpeg_path = self.get_ffmpeg_path()
         if not ffmpeg_path:
             return {"available_encoders": [], "recommended_encoder": "libx264"}
 
-        available_encoders: List[Dict[str, Any]] = []
+        cache_key = self._capability_cache_key(ffmpeg_path)
+        cached = self._load_capability_cache(cache_key)
+        if cached is not None:
+            self._cached_check_result = cached
+            _logger.debug("Hardware encoder detection loaded from cache: %s", self.capability_cache_path)
+            return cached
 
-        encoders_to_check = [
-            {"name": "h264_nvenc", "type": "nvidia", "codec": "h264", "description": "NVIDIA H.264硬件编码"},
-            {"name": "hevc_nvenc", "type": "nvidia", "codec": "h265", "description": "NVIDIA H.265硬件编码"},
-            {"name": "h264_qsv", "type": "intel", "codec": "h264", "description": "Intel QSV H.264硬件编码"},
-            {"name": "hevc_qsv", "type": "intel", "codec": "h265", "description": "Intel QSV H.265硬件编码"},
-            {"name": "h264_amf", "type": "amd", "codec": "h264", "description": "AMD H.264硬件编码"},
-            {"name": "hevc_amf", "type": "amd", "codec": "h265", "description": "AMD H.265硬件编码"},
-            {"name": "h264_videotoolbox", "type": "apple", "codec": "h264", "description": "Apple H.264硬件编码"},
-            {"name": "hevc_videotoolbox", "type": "apple", "codec": "h265", "description": "Apple H.265硬件编码"},
-        ]
+        available_encoders: List[HardwareEncoder] = []
+        probe_succeeded = False
 
         try:
             cmd = [ffmpeg_path, "-encoders"]
             process = subprocess.run(cmd, capture_output=True, text=False, timeout=15)
 
             if process.returncode == 0:
-                encoders_output = process.stdout.decode("utf-8", errors="replace")
-                for encoder in encoders_to_check:
-                    if encoder["name"] in encoders_output:
-                        if self._test_encoder(ffmpeg_path, encoder["name"]):
-                            available_encoders.append(encoder)
-                            _logger.debug("Found available encoder: %s", encoder["description"])
-                        else:
-                            _logger.debug("Encoder %s exists but unavailable", encoder["name"])
+                probe_succeeded = True
+                encoder_names = self._parse_encoder_names(process.stdout.decode("utf-8", errors="replace"))
+                candidates = [encoder for encoder in _ENCODERS_TO_CHECK if encoder.name in encoder_names]
+                probe_results = self._probe_encoders(ffmpeg_path, [encoder.name for encoder in candidates])
+                for encoder, usable in zip(candidates, probe_results):
+                    if usable:
+                        available_encoders.append(encoder)
+                        _logger.debug("Found available encoder: %s", encoder.description)
+                    else:
+                        _logger.debug("Encoder %s exists but unavailable", encoder.name)
             else:
                 stderr_text = process.stderr.decode("utf-8", errors="replace") if process.stderr else ""
                 _logger.warning("获取编码器列表失败: %s", stderr_text)
@@ -103,13 +214,22 @@ class FFmpegManager:
 
         recommended_encoder = self._get_recommended_encoder(available_encoders)
 
+        encoder_infos = [encoder._asdict() for encoder in available_encoders]
+        for info in encoder_infos:
+            if info["type"] == "apple":
+                # VideoToolbox 的恒定质量模式依赖硬件与 ffmpeg 版本，不支持时 -q:v 会直接报错
+                info["supports_qscale"] = self._test_encode(ffmpeg_path, info["name"], ("-q:v", "50"))
+                _logger.debug("%s supports -q:v: %s", info["name"], info["supports_qscale"])
+
         result = {
-            "available_encoders": available_encoders,
+            "available_encoders": encoder_infos,
             "recommended_encoder": recommended_encoder,
             "total_hardware_encoders": len(available_encoders),
         }
 
         self._cached_check_result = result
+        if probe_succeeded and cache_key is not None:
+            self._save_capability_cache(cache_key, result)
         _logger.debug(
             "Hardware encoder detection complete: %d available, recommend: %s",
             len(available_encoders),
@@ -117,23 +237,129 @@ class FFmpegManager:
         )
         return result
 
+    def _capability_cache_key(self, ffmpeg_path: str) -> Optional[Dict[str, Any]]:
+        """以 ffmpeg 路径、mtime、大小和系统构造缓存键；ffmpeg 被替换后缓存自动失效。"""
+        try:
+            stat_result = os.stat(ffmpeg_path)
+        except OSError:
+            return None
+        return {
+            "ffmpeg_path": ffmpeg_path,
+            "mtime_ns": stat_result.st_mtime_ns,
+            "size": stat_result.st_size,
+            "system": self.system,
+            "version": _CAPABILITY_CACHE_VERSION,
+        }
+
+    def _load_capability_cache(self, cache_key: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """读取持久化的编码器检测结果，键不匹配时视为失效。"""
+        if cache_key is None:
+            return None
+        try:
+            with open(self.capability_cache_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            _logger.debug("Failed to read encoder capability cache: %s", e)
+            return None
+
+        if not isinstance(payload, dict) or payload.get("key") != cache_key:
+            return None
+        result = payload.get("result")
+        return result if isinstance(result, dict) else None
+
+    def _save_capability_cache(self, cache_key: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """将编码器检测结果写入插件目录，写入失败不影响本次检测。"""
+        tmp_path = f"{self.capability_cache_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": cache_key, "result": result}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.capability_cache_path)
+        except Exception as e:
+            _logger.debug("Failed to write encoder capability cache: %s", e)
+
+    @staticmethod
+    def _parse_encoder_names(encoders_output: str) -> frozenset:
+        """从 ``ffmpeg -encoders`` 输出中提取编码器名称（跳过 ``------`` 之前的图例）。"""
+        names = set()
+        in_table = False
+        for line in encoders_output.splitlines():
+            if not in_table:
+                in_table = line.strip().startswith("------")
+                continue
+            parts = line.split()
+            if len(parts) >= 2:
+                names.add(parts[1])
+        return frozenset(names)
+
+    def _probe_encoders(self, ffmpeg_path: str, encoder_names: List[str]) -> List[bool]:
+        """并发测试多个编码器，总耗时取决于最慢的一次探测而非逐个累加。"""
+        if not encoder_names:
+            return []
+        with ThreadPoolExecutor(max_workers=len(encoder_names), thread_name_prefix="ffmpeg_probe") as pool:
+            return list(
+                pool.map(
+                    lambda name: self._test_encoder(ffmpeg_path, name),
+                    encoder_names,
+                )
+            )
+
     def _test_encoder(self, ffmpeg_path: str, encoder_name: str) -> bool:
-        """测试编码器是否真正可用。"""
+        """测试编码器是否可用。
+
+        先用廉价的 ``-h encoder=<name>`` 排除未编译进 ffmpeg 的编码器，再实际试编码一次：
+        发行版 ffmpeg 常编译了 nvenc/qsv 却没有对应硬件。检测结果按 ffmpeg 持久化，
+        试编码每个 ffmpeg 只需执行一次。
+        """
+        try:
+            cmd = [ffmpeg_path, "-hide_banner", "-h", f"encoder={encoder_name}"]
+            process = subprocess.run(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                timeout=10,
+            )
+            if process.returncode != 0 or b"Encoder " not in process.stdout:
+                return False
+        except Exception:
+            return False
+
+        return self._test_encode(ffmpeg_path, encoder_name)
+
+    def _test_encode(self, ffmpeg_path: str, encoder_name: str, extra_args: Tuple[str, ...] = ()) -> bool:
+        """用 lavfi 测试源实际编码 1 秒，确认编码器（及附加参数）真正可用。"""
         try:
             cmd = [
                 ffmpeg_path,
                 "-f", "lavfi",
                 "-i", "testsrc=duration=1:size=320x240:rate=1",
                 "-c:v", encoder_name,
+                *extra_args,
                 "-t", "1",
                 "-f", "null", "-",
             ]
-            process = subprocess.run(cmd, capture_output=True, text=False, timeout=10)
+            # 只关心退出码，输出直接丢弃，避免管道读取与写满阻塞
+            process = subprocess.run(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=10,
+            )
             return process.returncode == 0
         except Exception:
             return False
 
-    def _get_recommended_encoder(self, available_encoders: List[Dict[str, Any]]) -> str:
+    def encoder_supports_qscale(self, encoder_name: str) -> bool:
+        """编码器是否接受 -q:v；未检测过的编码器按支持处理。"""
+        for info in self.check_hardware_encoders().get("available_encoders", []):
+            if info.get("name") == encoder_name:
+                return info.get("supports_qscale", True)
+        return True
+
+    def _get_recommended_encoder(self, available_encoders: List[HardwareEncoder]) -> str:
         """根据可用编码器选择推荐的编码器。"""
         if not available_encoders:
             return "libx264"
@@ -141,10 +367,10 @@ class FFmpegManager:
         priority_order = ["nvidia", "intel", "amd", "apple"]
         for encoder_type in priority_order:
             for encoder in available_encoders:
-                if encoder["type"] == encoder_type and encoder["codec"] == "h264":
-                    return encoder["name"]
+                if encoder.type == encoder_type and encoder.codec == "h264":
+                    return encoder.name
 
-        return available_encoders[0]["name"]
+        return available_encoders[0].name
 
     _cached_availability_result: Optional[Dict[str, Any]] = None
 
@@ -152,7 +378,13 @@ class FFmpegManager:
         """检查 FFmpeg 可用性（带缓存）。"""
         if self._cached_availability_result is not None:
             return self._cached_availability_result
+        with self._detect_lock:
+            if self._cached_availability_result is not None:
+                return self._cached_availability_result
+            return self._detect_ffmpeg_availability()
 
+    def _detect_ffmpeg_availability(self) -> Dict[str, Any]:
+        """实际执行可用性检测（调用方已持有检测锁）。"""
         result: Dict[str, Any] = {
             "ffmpeg_available": False,
             "ffprobe_available": False,
@@ -170,10 +402,16 @@ class FFmpegManager:
 
             try:
                 cmd = [ffmpeg_path, "-version"]
-                process = subprocess.run(cmd, capture_output=True, text=False, timeout=10)
+                process = subprocess.run(
+                    cmd,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    timeout=10,
+                )
                 if process.returncode == 0:
-                    stdout_text = process.stdout.decode("utf-8", errors="replace")
-                    version_line = stdout_text.split("\n")[0] if stdout_text else ""
+                    first_line = process.stdout.split(b"\n", 1)[0]
+                    version_line = first_line.decode("utf-8", errors="replace").rstrip("\r")
                     result["ffmpeg_version"] = version_line
                     _logger.debug("FFmpeg version: %s", version_line)
                     result["hardware_acceleration"] = self.check_hardware_encoders()
@@ -193,9 +431,35 @@ class FFmpegManager:
         )
         return result
 
+    def clear_path_cache(self) -> None:
+        """清空可执行文件路径及依赖它的全部缓存（例如运行中安装或更换了 FFmpeg 后需重新查找）。
 
-# 全局 FFmpeg 管理器实例（进程级单例，跨模块共享缓存）
-ffmpeg_manager = FFmpegManager()
+        可用性、硬件编码器检测与编码器选择结果都描述的是旧的可执行文件，须一并清空。
+        """
+        with self._detect_lock:
+            _get_executable_path.cache_clear()
+            self._cached_availability_result = None
+            self._cached_check_result = None
+            self._encoder_choice_cache.clear()
+            self._failed_encoders.clear()
+
+    async def check_ffmpeg_availability_async(self) -> Dict[str, Any]:
+        """异步版 check_ffmpeg_availability：首次检测（含硬件编码器探测）在线程池中执行，不阻塞事件循环。"""
+        if self._cached_availability_result is not None:
+            return self._cached_availability_result
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.check_ffmpeg_availability)
+
+
+def _qscale_to_bitrate(quality: int) -> str:
+    """把 CRF 风格的质量值换算为 -b:v 码率：以 23 对应 4000k，每增加 6 码率减半。"""
+    return f"{round(4000 * 2 ** ((23 - quality) / 6))}k"
+
+
+@functools.cache
+def get_ffmpeg_manager() -> FFmpegManager:
+    """获取进程级共享的 FFmpeg 管理器（首次调用时创建，跨模块共享缓存）。"""
+    return FFmpegManager()
 
 
 class VideoCompressor:
@@ -208,20 +472,20 @@ class VideoCompressor:
         force_encoder: str = "",
         encoder_priority: Optional[List[str]] = None,
     ):
-        self.ffmpeg_path = ffmpeg_path or ffmpeg_manager.get_ffmpeg_path()
+        self.ffmpeg_path = ffmpeg_path or get_ffmpeg_manager().get_ffmpeg_path()
         if not self.ffmpeg_path:
             _logger.warning("未找到 ffmpeg，将使用系统默认路径")
             self.ffmpeg_path = "ffmpeg"
 
         if not enable_hardware:
-            self.recommended_encoder = "libx264"
+            self._set_encoder("libx264")
             _logger.debug("Hardware acceleration disabled, using software: libx264")
         elif force_encoder:
-            self.recommended_encoder = force_encoder
+            self._set_encoder(force_encoder)
             _logger.debug("Using forced encoder: %s", force_encoder)
         else:
-            self.hardware_info = ffmpeg_manager.check_hardware_encoders()
-            self.recommended_encoder = self._select_best_encoder(encoder_priority or ["nvidia", "intel", "amd", "apple"])
+            self.hardware_info = get_ffmpeg_manager().check_hardware_encoders()
+            self._set_encoder(self._select_best_encoder(encoder_priority or ["nvidia", "intel", "amd", "apple"]))
 
             if self.recommended_encoder != "libx264":
                 available_count = self.hardware_info.get("total_hardware_encoders", 0)
@@ -231,20 +495,7 @@ class VideoCompressor:
 
     def _select_best_encoder(self, priority_list: List[str]) -> str:
         """根据配置的优先级选择最佳编码器。"""
-        available_encoders = self.hardware_info.get("available_encoders", [])
-        if not available_encoders:
-            return "libx264"
-
-        for encoder_type in priority_list:
-            for encoder in available_encoders:
-                if encoder["type"] == encoder_type and encoder["codec"] == "h264":
-                    return encoder["name"]
-
-        for encoder in available_encoders:
-            if encoder["codec"] == "h264":
-                return encoder["name"]
-
-        return "libx264"
+        return get_ffmpeg_manager().select_encoder(tuple(priority_list))
 
     def compress_video(
         self,
@@ -252,6 +503,7 @@ class VideoCompressor:
         output_path: str,
         target_size_mb: int = 100,
         quality: int = 23,
+        audio_path: Optional[str] = None,
     ) -> bool:
         """压缩视频到指定大小。
 
@@ -260,6 +512,7 @@ class VideoCompressor:
             output_path: 输出视频路径
             target_size_mb: 目标文件大小（MB）
             quality: 压缩质量 (1-51，数值越小质量越高)
+            audio_path: 独立的音频输入（如 DASH 音频分段），与视频一并编码输出
 
         Returns:
             是否压缩成功
@@ -269,7 +522,10 @@ class VideoCompressor:
                 _logger.error("输入文件不存在: %s", input_path)
                 return False
 
-            input_size_mb = os.path.getsize(input_path) / (1024 * 1024)
+            input_size = os.path.getsize(input_path)
+            if audio_path:
+                input_size += os.path.getsize(audio_path)
+            input_size_mb = input_size / (1024 * 1024)
             _logger.info(
                 "Starting video compression: input=%s, size=%.2fMB, target=%dMB, encoder=%s",
                 input_path,
@@ -278,45 +534,69 @@ class VideoCompressor:
                 self.recommended_encoder,
             )
 
-            if input_size_mb <= target_size_mb:
+            if input_size_mb <= target_size_mb and not audio_path:
                 shutil.copy2(input_path, output_path)
                 _logger.debug("File size already meets requirement, skipping compression (%.2fMB)", input_size_mb)
                 return True
 
-            cmd = self._build_compression_command(input_path, output_path, quality)
-            _logger.debug("Executing FFmpeg compression: %s", " ".join(cmd))
-
-            result = subprocess.run(cmd, capture_output=True, text=False, timeout=1800)
-
-            if result.returncode == 0:
-                if os.path.exists(output_path):
-                    output_size_mb = os.path.getsize(output_path) / (1024 * 1024)
-                    compression_ratio = (1 - output_size_mb / input_size_mb) * 100
-                    _logger.info(
-                        "Video compression successful: %.2fMB -> %.2fMB (%.1f%%), encoder=%s",
-                        input_size_mb,
+            # 输出仍超限时逐步提高质量参数重试；硬件编码失败时以相同质量回退到 libx264
+            hardware_failure: Optional[Tuple[str, bytes]] = None
+            while True:
+                cmd = self._build_compression_command(input_path, output_path, quality, audio_path)
+                _logger.debug("Executing FFmpeg compression: %s", " ".join(cmd))
+
+                result = subprocess.run(
+                    cmd,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    bufsize=FFMPEG_BUFSIZE,
+                    timeout=1800,
+                )
+
+                if result.returncode != 0:
+                    if self.recommended_encoder != "libx264":
+                        # 硬件编码失败时回退到软件编码；是否停用该编码器待 libx264 重试成功后再判断
+                        _logger.warning("硬件编码器 %s 压缩失败，回退到 libx264", self.recommended_encoder)
+                        hardware_failure = (self.recommended_encoder, result.stderr or b"")
+                        self._set_encoder("libx264")
+                        continue
+
+                    _logger.error("视频压缩失败，返回码: %d", result.returncode)
+                    if result.stderr:
+                        stderr_text = result.stderr.decode("utf-8", errors="replace")
+                        _logger.error("FFmpeg错误: %s", stderr_text)
+                    return False
+
+                if not os.path.exists(output_path):
+                    _logger.error("压缩后文件不存在")
+                    return False
+
+                if hardware_failure is not None:
+                    # 同一输入软件编码成功，说明失败与输入/磁盘无关
+                    self._remember_hardware_failure(*hardware_failure)
+                    hardware_failure = None
+
+                output_size_mb = os.path.getsize(output_path) / (1024 * 1024)
+                compression_ratio = (1 - output_size_mb / input_size_mb) * 100
+                _logger.info(
+                    "Video compression successful: %.2fMB -> %.2fMB (%.1f%%), encoder=%s",
+                    input_size_mb,
+                    output_size_mb,
+                    compression_ratio,
+                    self.recommended_encoder,
+                )
+
+                if output_size_mb > target_size_mb and quality < 35:
+                    _logger.debug(
+                        "Output still oversized (%.2fMB > %dMB), increasing compression",
                         output_size_mb,
-                        compression_ratio,
-                        self.recommended_encoder,
+                        target_size_mb,
                     )
+                    quality += 5
+                    continue
 
-                    if output_size_mb > target_size_mb and quality < 35:
-                        _logger.debug(
-                            "Output still oversized (%.2fMB > %dMB), increasing compression",
-                            output_size_mb,
-                            target_size_mb,
-                        )
-                        return self.compress_video(input_path, output_path, target_size_mb, quality + 5)
-
-                    return True
-                _logger.error("压缩后文件不存在")
-                return False
-
-            _logger.error("视频压缩失败，返回码: %d", result.returncode)
-            if result.stderr:
-                stderr_text = result.stderr.decode("utf-8", errors="replace")
-                _logger.error("FFmpeg错误: %s", stderr_text)
-            return False
+                return True
 
         except subprocess.TimeoutExpired:
             _logger.error("视频压缩超时")
@@ -325,51 +605,48 @@ class VideoCompressor:
             _logger.error("视频压缩异常: %s", e)
             return False
 
-    def _build_compression_command(self, input_path: str, output_path: str, quality: int) -> List[str]:
-        """构建基于硬件加速的压缩命令。"""
-        cmd = [self.ffmpeg_path, "-i", input_path]
-
-        if "nvenc" in self.recommended_encoder:
-            cmd.extend([
-                "-c:v", self.recommended_encoder,
-                "-cq", str(quality),
-                "-preset", "p4",
-                "-profile:v", "high",
-                "-c:a", "aac",
-                "-b:a", "128k",
-            ])
-        elif "qsv" in self.recommended_encoder:
-            cmd.extend([
-                "-c:v", self.recommended_encoder,
-                "-global_quality", str(quality),
-                "-preset", "medium",
-                "-c:a", "aac",
-                "-b:a", "128k",
-            ])
-        elif "amf" in self.recommended_encoder:
-            cmd.extend([
-                "-c:v", self.recommended_encoder,
-                "-qp_i", str(quality),
-                "-qp_p", str(quality),
-                "-quality", "balanced",
-                "-c:a", "aac",
-                "-b:a", "128k",
-            ])
-        elif "videotoolbox" in self.recommended_encoder:
-            cmd.extend([
-                "-c:v", self.recommended_encoder,
-                "-q:v", str(quality),
-                "-c:a", "aac",
-                "-b:a", "128k",
-            ])
+    @staticmethod
+    def _remember_hardware_failure(encoder: str, stderr: bytes) -> None:
+        """硬件编码失败且 stderr 表明设备/驱动不可用时，本进程内停用该编码器。"""
+        stderr_text = stderr.decode("utf-8", errors="replace")
+        if any(marker in stderr_text.lower() for marker in _HW_DEVICE_ERROR_MARKERS):
+            _logger.warning("硬件编码器 %s 设备/驱动不可用，后续压缩直接使用其他编码器", encoder)
+            get_ffmpeg_manager().mark_encoder_failed(encoder)
+        else:
+            _logger.debug("Hardware encoder %s failed without a device error, keeping it: %s", encoder, stderr_text)
+
+    def _set_encoder(self, encoder: str) -> None:
+        """设置编码器，并预先生成该编码器的压缩参数模板。"""
+        self.recommended_encoder = encoder
+        for family, quality_flags, extra_args in _ENCODER_ARG_PROFILES:
+            if family in encoder:
+                break
         else:
-            cmd.extend([
-                "-c:v", "libx264",
-                "-crf", str(quality),
-                "-preset", "medium",
-                "-c:a", "aac",
-                "-b:a", "128k",
-            ])
-
-        cmd.extend(["-movflags", "+faststart", "-y", output_path])
+            encoder = "libx264"
+            quality_flags, extra_args = _LIBX264_ARG_PROFILE
+        quality_to_arg = str
+        if "videotoolbox" in encoder and not get_ffmpeg_manager().encoder_supports_qscale(encoder):
+            quality_flags, quality_to_arg = _VIDEOTOOLBOX_BITRATE_FLAGS, _qscale_to_bitrate
+        self._video_codec_args = ["-c:v", encoder]
+        self._quality_flags = quality_flags
+        self._quality_to_arg = quality_to_arg
+        self._encoder_args = [*extra_args, *_AUDIO_ARGS]
+
+    def _build_compression_command(
+        self,
+        input_path: str,
+        output_path: str,
+        quality: int,
+        audio_path: Optional[str] = None,
+    ) -> List[str]:
+        """构建基于硬件加速的压缩命令。"""
+        quality_str = self._quality_to_arg(quality)
+        cmd = [self.ffmpeg_path, *FFMPEG_BATCH_ARGS, "-i", input_path]
+        if audio_path:
+            cmd += ("-i", audio_path)
+        cmd += self._video_codec_args
+        for flag in self._quality_flags:
+            cmd += (flag, quality_str)
+        cmd += self._encoder_args
+        cmd += ("-movflags", "+faststart", "-y", output_path)
         return cmd
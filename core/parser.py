@@ -2,21 +2,130 @@
 """哔哩哔哩视频链接解析与 WBI 签名。"""
 from __future__ import annotations
 
+import asyncio
+import functools
 import hashlib
+import itertools
 import json
 import logging
+import operator
 import re
+import string
 import subprocess
 import time
 import urllib.parse
-import urllib.request
-from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import aiohttp
 
 from .auth import apply_set_cookie, build_cookie_header, has_login_cookie, normalize_credentials
-from .ffmpeg import ffmpeg_manager
+from .ffmpeg import get_ffmpeg_manager
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # orjson 为可选依赖，缺失时回退到标准库
+
+    def _loads(data: Union[bytes, str]) -> Any:
+        # json 直接接受 bytes（自动识别 UTF-8/BOM），省去一次 decode 复制
+        return json.loads(data)
+
 
 _logger = logging.getLogger("plugin.bilibili_video_sender.parser")
 
+_API_TIMEOUT = aiohttp.ClientTimeout(total=15)
+# 空闲连接保活时长：aiohttp 默认 15 秒，群聊中两条链接间隔通常更长，
+# 延长后后续消息可复用已建立的 TLS 连接，省去握手往返
+_API_KEEPALIVE_TIMEOUT = 120
+_session: Optional[aiohttp.ClientSession] = None
+
+
+async def _get_session() -> aiohttp.ClientSession:
+    """获取 B站 API 共享会话（惰性创建），view/playurl/nav 请求复用 keep-alive 连接。"""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=10,
+                ttl_dns_cache=300,
+                keepalive_timeout=_API_KEEPALIVE_TIMEOUT,
+            ),
+            timeout=_API_TIMEOUT,
+            # 与原 urlopen 行为一致：遵循 HTTP(S)_PROXY / NO_PROXY 环境变量
+            trust_env=True,
+        )
+    return _session
+
+
+async def close_api_session() -> None:
+    """关闭 B站 API 共享会话（插件卸载时调用）。"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    # asyncio.Lock 绑定创建时的事件循环，插件重新加载后需重新创建
+    BilibiliWbiSigner._refresh_lock = None
+    prefetch_task = BilibiliWbiSigner._prefetch_task
+    if prefetch_task is not None and not prefetch_task.done():
+        prefetch_task.cancel()
+    BilibiliWbiSigner._prefetch_task = None
+
+
+# playurl 请求中不随视频/清晰度变化的参数；非 WBI 接口直接拼接预编码的查询串
+_PLAYURL_STATIC_PARAMS = {"otype": "json", "fnver": "0", "fnval": "4048", "platform": "pc"}
+_PLAYURL_STATIC_QUERY = urllib.parse.urlencode(_PLAYURL_STATIC_PARAMS)
+
+
+class _TTLCache:
+    """带过期时间的 LRU 缓存。仅在事件循环线程中访问，无需加锁。"""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple[Any, ...], Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Tuple[Any, ...]) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: Tuple[Any, ...], value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+# playurl 响应缓存：同一 (请求参数, Cookie) 在 TTL 内直接复用 data，跳过 WBI 签名与网络请求。
+# 播放地址带有效期签名，TTL 取较短值
+_playurl_cache = _TTLCache(ttl=60.0, maxsize=128)
+# view 接口响应缓存：群聊中同一视频常被反复分享，标题/分P/cid 短时间内不会变化
+_view_cache = _TTLCache(ttl=300.0, maxsize=256)
+
+
+@functools.lru_cache(maxsize=8)
+def _buvid3_md5_state(buvid3: str) -> Any:
+    """缓存已吸收 buvid3 前缀的 md5 状态（只读，使用方需 copy）。
+
+    md5 仅用于生成协议要求的 session 摘要，非安全用途；FIPS 模式下也可用。
+    """
+    return hashlib.md5(buvid3.encode("utf-8"), usedforsecurity=False)
+
+
+def _playurl_session(buvid3: str) -> str:
+    """生成 playurl 的 session 参数：md5(buvid3 + 毫秒时间戳)。"""
+    digest = _buvid3_md5_state(buvid3).copy()
+    digest.update(str(int(time.time() * 1000)).encode("ascii"))
+    return digest.hexdigest()
+
 
 class BilibiliVideoInfo:
     """基础视频信息。"""
@@ -38,14 +147,18 @@ class BilibiliParser:
         "Chrome/144.0.0.0 Safari/537.36"
     )
 
+    # 协议与域名不区分大小写（仅对该部分局部启用 (?i:...)）；路径中的 BV 号、b23 短码区分大小写，原样保留
     VIDEO_URL_PATTERN = re.compile(
-        r"https?://(?:(?:www|m)\.)?bilibili\.com/video/(?P<bv>BV[\w]+|av\d+)(?:/)?(?:\?[^\s#]+)?",
-        re.IGNORECASE,
+        r"(?i:https?://(?:(?:www|m)\.)?bilibili\.com)/video/(?P<bv>[Bb][Vv]\w+|[Aa][Vv]\d+)(?:/)?(?:\?[^\s#]+)?"
     )
-    B23_SHORT_PATTERN = re.compile(
-        r"https?://b23\.tv/[\w]+(?:\?[^\s#]+)?",
-        re.IGNORECASE,
+    B23_SHORT_PATTERN = re.compile(r"(?i:https?://b23\.tv)/\w+(?:\?[^\s#]+)?")
+    # 短链与视频链接合并为一次扫描
+    _COMBINED_URL_PATTERN = re.compile(
+        f"(?P<short>{B23_SHORT_PATTERN.pattern})|(?P<video>{VIDEO_URL_PATTERN.pattern})"
     )
+    AV_ID_PATTERN = re.compile(r"/video/[Aa][Vv](?P<aid>\d+)")
+    # VIDEO_URL_PATTERN 的 BV 前缀可能以任意大小写组合出现
+    _BV_PREFIXES = ("BV", "bv", "Bv", "bV")
     QN_TEXT_PATTERN = re.compile(r"(?:[?&]|\b)qn\s*=\s*(\d+)", re.IGNORECASE)
     QN_INFO = {
         16: "360P 流畅",
@@ -84,53 +197,98 @@ class BilibiliParser:
         return BilibiliParser.safe_int(match.group(1), 0) or None
 
     @staticmethod
-    def extract_page_param(url: str) -> int:
-        """解析分P参数 p，默认为 1。"""
+    @functools.lru_cache(maxsize=64)
+    def _extract_url_params(url: str) -> Tuple[int, Optional[int]]:
+        """一次解析 URL 查询串，返回 (分P p, 清晰度 qn)；p 默认 1，qn 未指定为 None。"""
+        if not url:
+            return 1, None
         try:
-            parsed = urllib.parse.urlparse(url)
+            parsed = urllib.parse.urlparse(BilibiliParser._sanitize_url(url))
             qs = urllib.parse.parse_qs(parsed.query or "")
-            p_raw = qs.get("p", [None])[0]
-            p_val = BilibiliParser.safe_int(p_raw, 1)
-            return p_val if p_val > 0 else 1
         except Exception:
-            return 1
+            return 1, None
+
+        p_val = BilibiliParser.safe_int(qs.get("p", [None])[0], 1)
+        page = p_val if p_val > 0 else 1
+
+        qn_raw = qs.get("qn", [None])[0]
+        qn_val = BilibiliParser.safe_int(qn_raw, 0) if qn_raw is not None else 0
+        return page, (qn_val if qn_val > 0 else None)
+
+    @staticmethod
+    def extract_page_param(url: str) -> int:
+        """解析分P参数 p，默认为 1。"""
+        return BilibiliParser._extract_url_params(url)[0]
 
     @staticmethod
     def extract_qn_param(url: str) -> Optional[int]:
         """解析清晰度参数 qn，返回 None 表示未指定。"""
-        if not url:
-            return None
-        try:
-            parsed = urllib.parse.urlparse(BilibiliParser._sanitize_url(url))
-            qs = urllib.parse.parse_qs(parsed.query or "")
-            qn_raw = qs.get("qn", [None])[0]
-            if qn_raw is None:
-                return None
-            qn_val = BilibiliParser.safe_int(qn_raw, 0)
-            return qn_val if qn_val > 0 else None
-        except Exception:
-            return None
+        return BilibiliParser._extract_url_params(url)[1]
 
     @staticmethod
-    def _normalize_stream_urls(primary: Optional[str], backups: Optional[List[str]] = None) -> List[str]:
+    def _normalize_stream_urls(primary: Optional[str], backups: Optional[Sequence[str]] = None) -> List[str]:
         """合并主链与备链，去重并统一为 https。"""
-        urls: List[str] = []
-        if primary:
-            urls.append(primary)
+        urls = [primary] if primary else []
         if backups:
-            for item in backups:
-                if item:
-                    urls.append(item)
-        normalized: List[str] = []
-        for u in urls:
-            u2 = u.replace("http:", "https:")
-            if u2 not in normalized:
-                normalized.append(u2)
-        return normalized
+            urls.extend(backups)
+        # dict 保持插入顺序，O(N) 去重
+        return list(dict.fromkeys(u.replace("http:", "https:") for u in urls if u))
+
+    # 未登录时的清晰度提示，按门槛从高到低排列，只提示命中的最高一档
+    _QN_LOGIN_WARNINGS = (
+        (125, "需要大会员账号"),
+        (116, "高帧率需要大会员账号"),
+        (80, "清晰度需要大会员账号"),
+        (64, "清晰度但未登录，可能失败"),
+    )
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _unknown_qn_name(qn: int) -> str:
+        return f"未知({qn})"
+
+    @staticmethod
+    def _best_audio_stream(dash: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], int]:
+        """在普通、杜比与 flac 音频中选出码率最高的一条，返回 (音频流, 音频流总数)。"""
+        audios = dash.get("audio") or ()
+        dolby_audios = (dash.get("dolby") or {}).get("audio") or ()
+        flac_audio = (dash.get("flac") or {}).get("audio")
+        flac_audios = (flac_audio,) if flac_audio else ()
+        # 并列时取首个，与原先稳定排序后取第一条的结果一致
+        best_audio = max(
+            itertools.chain(audios, dolby_audios, flac_audios),
+            key=lambda x: x.get("bandwidth", 0),
+            default=None,
+        )
+        return best_audio, len(audios) + len(dolby_audios) + len(flac_audios)
+
+    @staticmethod
+    def _extract_stream_urls(stream: Dict[str, Any]) -> List[str]:
+        """提取单条流（DASH 流或 durl 分段）的主链与备链。"""
+        return BilibiliParser._normalize_stream_urls(
+            stream.get("url") or stream.get("baseUrl") or stream.get("base_url"),
+            stream.get("backupUrl") or stream.get("backup_url") or (),
+        )
 
     @staticmethod
     def get_qn_name(qn: int) -> str:
-        return BilibiliParser.QN_INFO.get(qn, f"未知({qn})")
+        name = BilibiliParser.QN_INFO.get(qn)
+        return name if name is not None else BilibiliParser._unknown_qn_name(qn)
+
+    @staticmethod
+    def _qn_login_warning(qn: int) -> Optional[str]:
+        """返回未登录时该清晰度对应的提示（取命中的最高门槛），无需提示时返回 None。"""
+        for threshold, message in BilibiliParser._QN_LOGIN_WARNINGS:
+            if qn >= threshold:
+                return message
+        return None
+
+    @staticmethod
+    def _warn_qn_without_login(qn: int, qn_name: str, prefix: str = "") -> None:
+        """未登录请求高清晰度时给出一条提示。"""
+        message = BilibiliParser._qn_login_warning(qn)
+        if message is not None:
+            _logger.warning("%s请求 %s %s", prefix, qn_name, message)
 
     @staticmethod
     def validate_config(options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -183,14 +341,10 @@ class BilibiliParser:
                 validation_result["warnings"].append(f"qn={requested_qn} 不在常见清晰度列表，可能无效")
             _logger.info("清晰度配置: %s (qn=%d, strict=%s)", qn_name, requested_qn, strict_qn)
 
-        if effective_qn >= 64 and not sessdata:
-            validation_result["warnings"].append(f"请求{qn_name}清晰度但未配置Cookie，可能失败")
-        if effective_qn >= 80 and not sessdata:
-            validation_result["warnings"].append(f"请求{qn_name}清晰度需要大会员账号")
-        if effective_qn >= 116 and not sessdata:
-            validation_result["warnings"].append(f"请求{qn_name}高帧率需要大会员账号")
-        if effective_qn >= 125 and not sessdata:
-            validation_result["warnings"].append(f"请求{qn_name}需要大会员账号")
+        if not sessdata:
+            qn_warning = BilibiliParser._qn_login_warning(effective_qn)
+            if qn_warning is not None:
+                validation_result["warnings"].append(f"请求{qn_name}{qn_warning}")
 
         # 记录验证结果
         if validation_result["warnings"]:
@@ -202,42 +356,57 @@ class BilibiliParser:
         _logger.debug("Config validation: %s", "pass" if validation_result["valid"] else "fail")
         return validation_result
 
+    # 编码偏好：按顺序匹配 codecs 子串，数值越小越优先（avc > hevc > av1 > 其他）
+    _CODEC_RANK = {"avc": 0, "h264": 0, "hev": 1, "hvc": 1, "av01": 2}
+
     @staticmethod
     def _codec_rank(codecs: str) -> int:
         if not codecs:
             return 3
         codec_lower = codecs.lower()
-        if "avc" in codec_lower or "h264" in codec_lower:
-            return 0
-        if "hev" in codec_lower or "hvc" in codec_lower or "hevc" in codec_lower:
-            return 1
-        if "av01" in codec_lower:
-            return 2
-        return 3
+        return next((rank for token, rank in BilibiliParser._CODEC_RANK.items() if token in codec_lower), 3)
+
+    @staticmethod
+    def _decorate_video_streams(videos: List[Dict[str, Any]]) -> List[Tuple[int, int, int, Dict[str, Any]]]:
+        """把视频流转换为 (qn, codec_rank, bandwidth, video)，每条流只做一次转换，供日志与选流共用。"""
+        safe_int = BilibiliParser.safe_int
+        return [
+            (
+                safe_int(v.get("id")),
+                BilibiliParser._codec_rank(str(v.get("codecs", ""))),
+                safe_int(v.get("bandwidth")),
+                v,
+            )
+            for v in videos
+        ]
 
     @staticmethod
     def _select_video_stream(
         videos: List[Dict[str, Any]],
         target_qn: int,
         strict_qn: bool,
+        decorated: Optional[List[Tuple[int, int, int, Dict[str, Any]]]] = None,
     ) -> Tuple[Optional[Dict[str, Any]], Optional[int], str]:
         if not videos:
             return None, None, "no_video"
 
+        if decorated is None:
+            decorated = BilibiliParser._decorate_video_streams(videos)
+
         if target_qn > 0:
             if strict_qn:
-                eligible = [v for v in videos if BilibiliParser.safe_int(v.get("id")) == target_qn]
+                eligible = [d for d in decorated if d[0] == target_qn]
                 if not eligible:
                     return None, None, "strict_no_match"
             else:
-                eligible = [v for v in videos if BilibiliParser.safe_int(v.get("id")) <= target_qn]
+                eligible = [d for d in decorated if d[0] <= target_qn]
         else:
-            eligible = list(videos)
+            eligible = decorated
 
         if not eligible:
             if strict_qn:
                 return None, None, "strict_no_match"
-            eligible = list(videos)
+            eligible = decorated
             fallback = True
         else:
             fallback = False
@@ -245,20 +414,16 @@ class BilibiliParser:
         if strict_qn and target_qn > 0:
             candidates = list(eligible)
         else:
-            best_id = max((BilibiliParser.safe_int(v.get("id")) for v in eligible), default=0)
+            best_id = max((d[0] for d in eligible), default=0)
             if best_id > 0:
-                candidates = [v for v in eligible if BilibiliParser.safe_int(v.get("id")) == best_id]
+                candidates = [d for d in eligible if d[0] == best_id]
             else:
                 candidates = list(eligible)
 
-        candidates.sort(
-            key=lambda v: (
-                BilibiliParser._codec_rank(str(v.get("codecs", ""))),
-                -BilibiliParser.safe_int(v.get("bandwidth")),
-            )
-        )
-        best_video = candidates[0] if candidates else None
-        selected_qn = BilibiliParser.safe_int(best_video.get("id")) if best_video else None
+        candidates.sort(key=lambda d: (d[1], -d[2]))
+        if not candidates:
+            return None, None, "fallback" if fallback else "ok"
+        selected_qn, _, _, best_video = candidates[0]
         return best_video, selected_qn, "fallback" if fallback else "ok"
 
     @staticmethod
@@ -278,14 +443,14 @@ class BilibiliParser:
         return None
 
     @staticmethod
-    def _build_request(url: str, headers: Optional[Dict[str, str]] = None) -> urllib.request.Request:
+    def _request_headers(headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
         default_headers = {
             "User-Agent": BilibiliParser.USER_AGENT,
             "Referer": "https://www.bilibili.com/",
         }
         if headers:
             default_headers.update(headers)
-        return urllib.request.Request(url, headers=default_headers)
+        return default_headers
 
     @staticmethod
     def _credentials_from_options(options: Dict[str, Any]) -> Dict[str, Any]:
@@ -304,19 +469,20 @@ class BilibiliParser:
         return build_cookie_header(BilibiliParser._credentials_from_options(options))
 
     @staticmethod
-    def _fetch_json(url: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    async def _fetch_json(url: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """发送 HTTP 请求并解析 JSON。"""
-        req = BilibiliParser._build_request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=15) as resp:  # nosec - trusted public API
-            data = resp.read()
-        return json.loads(data.decode("utf-8", errors="ignore"))
+        session = await _get_session()
+        request_headers = BilibiliParser._request_headers(headers)
+        async with session.get(url, headers=request_headers, timeout=_API_TIMEOUT) as resp:
+            data = await resp.read()
+        return _loads(data)
 
     @staticmethod
-    def _follow_redirect(url: str) -> str:
+    async def _follow_redirect(url: str) -> str:
         """跟踪短链接跳转。"""
-        req = urllib.request.Request(url, headers={"User-Agent": "curl/8.0"})
-        with urllib.request.urlopen(req, timeout=15) as resp:  # nosec - trusted public short URL
-            return resp.geturl()
+        session = await _get_session()
+        async with session.get(url, headers={"User-Agent": "curl/8.0"}, timeout=_API_TIMEOUT) as resp:
+            return str(resp.url)
 
     @staticmethod
     def _extract_bvid(url: str) -> Optional[str]:
@@ -324,24 +490,25 @@ class BilibiliParser:
         if not match:
             return None
         raw_id = match.group("bv")
-        if raw_id.lower().startswith("bv"):
+        if raw_id.startswith(BilibiliParser._BV_PREFIXES):
             return raw_id
         return None
 
     @staticmethod
     def find_first_bilibili_url(text: str) -> Optional[str]:
-        """从文本中提取第一个 B站视频链接。"""
-        short = BilibiliParser.B23_SHORT_PATTERN.search(text)
-        if short:
-            return BilibiliParser._sanitize_url(short.group(0))
-
-        match = BilibiliParser.VIDEO_URL_PATTERN.search(text)
+        """从文本中提取第一个 B站视频链接（b23 短链或视频页链接，按出现顺序）。"""
+        # 绝大多数消息不含 B站链接：先做子串检查，两个域名片段都不存在时无需进入正则；
+        # 域名不区分大小写，检查在小写副本上进行（正则仍在原文上匹配，保留 BV 号/短码大小写）
+        lowered = text.lower()
+        if "b23.tv/" not in lowered and "bilibili.com/video/" not in lowered:
+            return None
+        match = BilibiliParser._COMBINED_URL_PATTERN.search(text)
         if match:
             return BilibiliParser._sanitize_url(match.group(0))
         return None
 
     @staticmethod
-    def get_view_info_by_url(
+    async def get_view_info_by_url(
         url: str,
         options: Optional[Dict[str, Any]] = None,
     ) -> Optional[BilibiliVideoInfo]:
@@ -359,17 +526,23 @@ class BilibiliParser:
         if bvid:
             query = f"bvid={urllib.parse.quote(bvid)}"
         else:
-            m = re.search(r"/video/av(?P<aid>\d+)", url)
+            m = BilibiliParser.AV_ID_PATTERN.search(url)
             if not m:
                 return None
             query = f"aid={m.group('aid')}"
 
-        api = f"https://api.bilibili.com/x/web-interface/view?{query}"
-        payload = BilibiliParser._fetch_json(api, headers=headers)
-        if payload.get("code") != 0:
-            return None
+        cache_key = (query, cookie_header)
+        data = _view_cache.get(cache_key)
+        if data is None:
+            api = f"https://api.bilibili.com/x/web-interface/view?{query}"
+            payload = await BilibiliParser._fetch_json(api, headers=headers)
+            if payload.get("code") != 0:
+                return None
+            data = payload.get("data", {})
+            _view_cache.put(cache_key, data)
+        else:
+            _logger.debug("View info cache hit: %s", query)
 
-        data = payload.get("data", {})
         pages = data.get("pages") or []
         if not pages:
             return None
@@ -390,7 +563,92 @@ class BilibiliParser:
         )
 
     @staticmethod
-    def get_play_urls(
+    def _log_stream_table(
+        title: str,
+        decorated_videos: List[Tuple[int, int, int, Dict[str, Any]]],
+        audios: List[Dict[str, Any]],
+    ) -> None:
+        """以单条 DEBUG 日志输出 DASH 流清单；未开启 DEBUG 时不做任何格式化。"""
+        if not _logger.isEnabledFor(logging.DEBUG):
+            return
+        lines = [f"{title}: {len(decorated_videos)} video streams, {len(audios)} audio streams"]
+        lines.extend(
+            f"  video id={qn} codecs={v.get('codecs', '')} bandwidth={bandwidth}"
+            for qn, _, bandwidth, v in decorated_videos
+        )
+        lines.extend(f"  audio id={a.get('id')} bandwidth={a.get('bandwidth', 0)}" for a in audios)
+        _logger.debug("\n".join(lines))
+
+    @staticmethod
+    async def _fetch_playurl_data(
+        params: Dict[str, Any],
+        buvid3: str,
+        cookie_header: str,
+        credentials: Dict[str, Any],
+        opts: Dict[str, Any],
+        log_prefix: str = "",
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        """请求 playurl 接口并返回 data（带短期缓存）；失败时返回 (None, 错误信息)。"""
+        cache_key = (tuple(sorted(params.items())), buvid3, cookie_header)
+        cached = _playurl_cache.get(cache_key)
+        if cached is not None:
+            _logger.debug("%splayurl 命中缓存", log_prefix)
+            return cached, "ok"
+
+        params = dict(params)
+        if buvid3:
+            params["session"] = _playurl_session(buvid3)
+
+        api_base = "https://api.bilibili.com/x/player/wbi/playurl"
+
+        try:
+            # WBI 签名需要完整参数集
+            final_params = await BilibiliWbiSigner.sign_params({**params, **_PLAYURL_STATIC_PARAMS})
+            query_str = urllib.parse.urlencode(final_params)
+        except Exception as e:
+            _logger.warning("%sWBI 签名失败，降级到非 WBI 接口: %s", log_prefix, e)
+            api_base = "https://api.bilibili.com/x/player/playurl"
+            query_str = f"{urllib.parse.urlencode(params)}&{_PLAYURL_STATIC_QUERY}"
+
+        api = f"{api_base}?{query_str}"
+
+        headers: Dict[str, str] = {}
+        if cookie_header:
+            headers["Cookie"] = cookie_header
+
+        try:
+            session = await _get_session()
+            request_headers = BilibiliParser._request_headers(headers)
+            async with session.get(api, headers=request_headers, timeout=_API_TIMEOUT) as resp:
+                data_bytes = await resp.read()
+                # 捕获 B站可能刷新的 Cookie（rolling session）
+                updated_credentials = apply_set_cookie(credentials, resp.headers)
+                if updated_credentials != credentials:
+                    opts["credentials"] = updated_credentials
+                    opts["auth_refreshed"] = True
+                    _logger.info("%sB站 Cookie 已由响应头自动刷新", log_prefix)
+        except Exception as e:
+            _logger.error("%sHTTP请求失败: %s", log_prefix, e)
+            return None, f"网络请求失败: {e}"
+
+        try:
+            payload = _loads(data_bytes)
+        except Exception as e:
+            _logger.error("%sJSON解析失败: %s", log_prefix, e)
+            return None, "响应数据格式错误"
+
+        if payload.get("code") != 0:
+            error_msg = payload.get("message", "接口返回错误")
+            _logger.error("%sAPI返回错误: code=%s, message=%s", log_prefix, payload.get("code"), error_msg)
+            return None, error_msg
+
+        _logger.debug("%sAPI请求成功，开始解析响应数据", log_prefix)
+        data = payload.get("data") or {}
+        _playurl_cache.put(cache_key, data)
+        return data, "ok"
+
+    @staticmethod
+    async def get_play_urls(
         aid: int,
         cid: int,
         options: Optional[Dict[str, Any]] = None,
@@ -419,83 +677,29 @@ class BilibiliParser:
         fourk = 1 if qn >= 120 else 0
 
         qn_name = BilibiliParser.get_qn_name(qn)
-        if qn >= 64 and not has_cookie:
-            _logger.warning("请求 %s 清晰度但未登录，可能失败", qn_name)
-        if qn >= 80 and not has_cookie:
-            _logger.warning("请求 %s 清晰度需要大会员账号", qn_name)
-        if qn >= 116 and not has_cookie:
-            _logger.warning("请求 %s 高帧率需要大会员账号", qn_name)
-        if qn >= 125 and not has_cookie:
-            _logger.warning("请求 %s 需要大会员账号", qn_name)
+        if not has_cookie:
+            BilibiliParser._warn_qn_without_login(qn, qn_name)
 
         opts["requested_qn"] = requested_qn
         opts["effective_qn"] = qn
         opts["qn_strict"] = strict_qn
 
+        # 固定参数见 _PLAYURL_STATIC_PARAMS，由 _fetch_playurl_data 合并
         params: Dict[str, Any] = {
-            "avid": str(aid),
-            "cid": str(cid),
-            "otype": "json",
-            "fnver": "0",
-            "fnval": "4048",
-            "fourk": str(fourk),
-            "platform": "pc",
+            "avid": f"{aid}",
+            "cid": f"{cid}",
+            "fourk": f"{fourk}",
         }
 
         if qn > 0:
             params["qn"] = str(qn)
 
-        if buvid3:
-            ms = str(int(time.time() * 1000))
-            session_hash = hashlib.md5((buvid3 + ms).encode("utf-8")).hexdigest()
-            params["session"] = session_hash
-
         if not has_cookie:
             params["gaia_source"] = "view-card"
 
-        api_base = "https://api.bilibili.com/x/player/wbi/playurl"
-
-        try:
-            final_params = BilibiliWbiSigner.sign_params(params)
-        except Exception as e:
-            _logger.warning("WBI 签名失败，降级到非 WBI 接口: %s", e)
-            api_base = "https://api.bilibili.com/x/player/playurl"
-            final_params = params
-
-        query_str = urllib.parse.urlencode(final_params)
-        api = f"{api_base}?{query_str}"
-
-        headers: Dict[str, str] = {}
-        if cookie_header:
-            headers["Cookie"] = cookie_header
-
-        try:
-            req = BilibiliParser._build_request(api, headers=headers)
-            with urllib.request.urlopen(req, timeout=15) as resp:  # nosec - trusted public API
-                data_bytes = resp.read()
-                # 捕获 B站可能刷新的 Cookie（rolling session）
-                updated_credentials = apply_set_cookie(credentials, resp.headers)
-                if updated_credentials != credentials:
-                    opts["credentials"] = updated_credentials
-                    opts["auth_refreshed"] = True
-                    _logger.info("B站 Cookie 已由响应头自动刷新")
-        except Exception as e:
-            _logger.error("HTTP请求失败: %s", e)
-            return None, f"网络请求失败: {e}"
-
-        try:
-            payload = json.loads(data_bytes.decode("utf-8", errors="ignore"))
-        except Exception as e:
-            _logger.error("JSON解析失败: %s", e)
-            return None, "响应数据格式错误"
-
-        if payload.get("code") != 0:
-            error_msg = payload.get("message", "接口返回错误")
-            _logger.error("API返回错误: code=%s, message=%s", payload.get("code"), error_msg)
-            return None, error_msg
-
-        _logger.debug("API请求成功，开始解析响应数据")
-        data = payload.get("data", {})
+        data, error = await BilibiliParser._fetch_playurl_data(params, buvid3, cookie_header, credentials, opts)
+        if data is None:
+            return None, error
 
         dash = data.get("dash")
         if not dash:
@@ -504,10 +708,7 @@ class BilibiliParser:
                 _logger.debug("找到 durl 格式数据，共 %d 个文件", len(durl))
                 if len(durl) > 1:
                     _logger.warning("durl 为多段视频（%d 段），当前仅处理第一段", len(durl))
-                item = durl[0]
-                primary = item.get("url") or item.get("baseUrl") or item.get("base_url")
-                backups = item.get("backup_url") or item.get("backupUrl") or []
-                urls = BilibiliParser._normalize_stream_urls(primary, backups)
+                urls = BilibiliParser._extract_stream_urls(durl[0])
                 if urls:
                     return {"type": "durl", "urls": urls}, "ok (durl格式)"
             return None, "未找到 dash 数据"
@@ -515,32 +716,21 @@ class BilibiliParser:
         videos = dash.get("video") or []
         audios = dash.get("audio") or []
 
-        _logger.debug("找到 %d 个视频流和 %d 个音频流", len(videos), len(audios))
-
-        # 处理杜比和 flac 音频
-        dolby_audios = []
-        flac_audios = []
-
-        dolby = dash.get("dolby")
-        if dolby and dolby.get("audio"):
-            dolby_audios = dolby.get("audio", [])
-
-        flac = dash.get("flac")
-        if flac and flac.get("audio"):
-            flac_audios = [flac.get("audio")]
-
-        all_audios = audios + dolby_audios + flac_audios
+        decorated_videos = BilibiliParser._decorate_video_streams(videos)
+        BilibiliParser._log_stream_table("DASH", decorated_videos, audios)
 
         if not videos:
             _logger.warning("未找到视频流")
             return None, "未找到视频流"
 
-        if not all_audios:
+        # 处理杜比和 flac 音频
+        best_audio, _ = BilibiliParser._best_audio_stream(dash)
+        if best_audio is None:
             _logger.warning("未找到音频流")
 
-        all_audios.sort(key=lambda x: x.get("bandwidth", 0), reverse=True)
-
-        best_video, selected_qn, selection_status = BilibiliParser._select_video_stream(videos, qn, strict_qn)
+        best_video, selected_qn, selection_status = BilibiliParser._select_video_stream(
+            videos, qn, strict_qn, decorated_videos
+        )
         if not best_video:
             if selection_status == "strict_no_match":
                 requested_name = BilibiliParser.get_qn_name(requested_qn)
@@ -582,16 +772,8 @@ class BilibiliParser:
         if selection_status == "fallback":
             _logger.info("No eligible streams for qn=%d, fell back to best available stream", qn)
 
-        video_url = best_video.get("baseUrl") or best_video.get("base_url")
-        video_backups = best_video.get("backupUrl") or best_video.get("backup_url") or []
-        video_urls = BilibiliParser._normalize_stream_urls(video_url, video_backups)
-
-        audio_urls: List[str] = []
-        if all_audios:
-            best_audio = all_audios[0]
-            audio_url = best_audio.get("baseUrl") or best_audio.get("base_url")
-            audio_backups = best_audio.get("backupUrl") or best_audio.get("backup_url") or []
-            audio_urls = BilibiliParser._normalize_stream_urls(audio_url, audio_backups)
+        video_urls = BilibiliParser._extract_stream_urls(best_video)
+        audio_urls = BilibiliParser._extract_stream_urls(best_audio) if best_audio is not None else []
 
         if video_urls:
             return {"type": "dash", "video_urls": video_urls, "audio_urls": audio_urls}, "ok"
@@ -600,7 +782,7 @@ class BilibiliParser:
         return None, "未获取到播放地址"
 
     @staticmethod
-    def get_play_urls_force_dash(
+    async def get_play_urls_force_dash(
         aid: int,
         cid: int,
         options: Optional[Dict[str, Any]] = None,
@@ -630,93 +812,38 @@ class BilibiliParser:
         fourk = 1 if qn >= 120 else 0
 
         qn_name = BilibiliParser.get_qn_name(qn)
-        if qn >= 64 and not has_cookie:
-            _logger.warning("Force DASH: 请求 %s 清晰度但未登录，可能失败", qn_name)
-        if qn >= 80 and not has_cookie:
-            _logger.warning("Force DASH: 请求 %s 清晰度需要大会员账号", qn_name)
-        if qn >= 116 and not has_cookie:
-            _logger.warning("Force DASH: 请求 %s 高帧率需要大会员账号", qn_name)
-        if qn >= 125 and not has_cookie:
-            _logger.warning("Force DASH: 请求 %s 需要大会员账号", qn_name)
+        if not has_cookie:
+            BilibiliParser._warn_qn_without_login(qn, qn_name, "Force DASH: ")
 
         opts["requested_qn"] = requested_qn
         opts["effective_qn"] = qn
         opts["qn_strict"] = strict_qn
 
+        # 固定参数见 _PLAYURL_STATIC_PARAMS，由 _fetch_playurl_data 合并
         params: Dict[str, Any] = {
-            "avid": str(aid),
-            "cid": str(cid),
-            "otype": "json",
-            "fourk": str(fourk),
-            "fnver": "0",
-            "fnval": "4048",
-            "platform": "pc",
+            "avid": f"{aid}",
+            "cid": f"{cid}",
+            "fourk": f"{fourk}",
         }
 
         if qn > 0:
             params["qn"] = str(qn)
 
-        if buvid3:
-            ms = str(int(time.time() * 1000))
-            session_hash = hashlib.md5((buvid3 + ms).encode("utf-8")).hexdigest()
-            params["session"] = session_hash
-
         if not has_cookie:
             params["gaia_source"] = "view-card"
 
-        api_base = "https://api.bilibili.com/x/player/wbi/playurl"
-
-        try:
-            final_params = BilibiliWbiSigner.sign_params(params)
-        except Exception as e:
-            _logger.warning("Force DASH: WBI签名失败，降级到非WBI接口: %s", e)
-            api_base = "https://api.bilibili.com/x/player/playurl"
-            final_params = params
-
-        query_str = urllib.parse.urlencode(final_params)
-        api = f"{api_base}?{query_str}"
-
-        headers: Dict[str, str] = {}
-        if cookie_header:
-            headers["Cookie"] = cookie_header
-
-        try:
-            req = BilibiliParser._build_request(api, headers=headers)
-            with urllib.request.urlopen(req, timeout=15) as resp:  # nosec - trusted public API
-                data_bytes = resp.read()
-                # 捕获 B站可能刷新的 Cookie（rolling session）
-                updated_credentials = apply_set_cookie(credentials, resp.headers)
-                if updated_credentials != credentials:
-                    opts["credentials"] = updated_credentials
-                    opts["auth_refreshed"] = True
-                    _logger.info("Force DASH: B站 Cookie 已由响应头自动刷新")
-        except Exception as e:
-            _logger.error("Force DASH HTTP error: %s", e)
-            return None, f"Force DASH network error: {e}"
-
-        try:
-            payload = json.loads(data_bytes.decode("utf-8", errors="ignore"))
-        except Exception as e:
-            _logger.error("Force DASH JSON parse error: %s", e)
-            return None, "Force DASH response format error"
-
-        if payload.get("code") != 0:
-            error_msg = payload.get("message", "API error")
-            _logger.error("Force DASH API error: code=%s, msg=%s", payload.get("code"), error_msg)
-            return None, error_msg
-
-        _logger.debug("Force DASH request successful, parsing response")
-        data = payload.get("data", {})
+        data, error = await BilibiliParser._fetch_playurl_data(
+            params, buvid3, cookie_header, credentials, opts, log_prefix="Force DASH: "
+        )
+        if data is None:
+            return None, error
 
         durl = data.get("durl") or []
         if durl:
             _logger.debug("Force DASH also returned durl format: %d files (single-file only)", len(durl))
             if len(durl) > 1:
                 _logger.warning("Force DASH: durl为多段视频（%d段），当前仅处理第一段", len(durl))
-            item = durl[0]
-            primary = item.get("url") or item.get("baseUrl") or item.get("base_url")
-            backups = item.get("backup_url") or item.get("backupUrl") or []
-            urls = BilibiliParser._normalize_stream_urls(primary, backups)
+            urls = BilibiliParser._extract_stream_urls(durl[0])
             if urls:
                 return {"type": "durl", "urls": urls}, "ok (durl格式)"
 
@@ -728,28 +855,17 @@ class BilibiliParser:
         videos = dash.get("video") or []
         audios = dash.get("audio") or []
 
-        _logger.debug("Force DASH: %d video streams, %d audio streams", len(videos), len(audios))
-
-        dolby_audios = []
-        flac_audios = []
-
-        dolby = dash.get("dolby")
-        if dolby and dolby.get("audio"):
-            dolby_audios = dolby.get("audio", [])
+        decorated_videos = BilibiliParser._decorate_video_streams(videos)
+        BilibiliParser._log_stream_table("Force DASH", decorated_videos, audios)
 
-        flac = dash.get("flac")
-        if flac and flac.get("audio"):
-            flac_audios = [flac.get("audio")]
-
-        all_audios = audios + dolby_audios + flac_audios
-
-        if not videos or not all_audios:
-            _logger.warning("Force DASH: missing streams - video=%d, audio=%d", len(videos), len(all_audios))
+        best_audio, audio_count = BilibiliParser._best_audio_stream(dash)
+        if not videos or best_audio is None:
+            _logger.warning("Force DASH: missing streams - video=%d, audio=%d", len(videos), audio_count)
             return None, "Missing video or audio streams"
 
-        all_audios.sort(key=lambda x: x.get("bandwidth", 0), reverse=True)
-
-        best_video, selected_qn, selection_status = BilibiliParser._select_video_stream(videos, qn, strict_qn)
+        best_video, selected_qn, selection_status = BilibiliParser._select_video_stream(
+            videos, qn, strict_qn, decorated_videos
+        )
         if not best_video:
             if selection_status == "strict_no_match":
                 requested_name = BilibiliParser.get_qn_name(requested_qn)
@@ -789,16 +905,8 @@ class BilibiliParser:
         if selection_status == "fallback":
             _logger.info("Force DASH: no eligible streams for qn=%d, fell back to best available stream", qn)
 
-        video_url = best_video.get("baseUrl") or best_video.get("base_url")
-        video_backups = best_video.get("backupUrl") or best_video.get("backup_url") or []
-        video_urls = BilibiliParser._normalize_stream_urls(video_url, video_backups)
-
-        audio_urls: List[str] = []
-        if all_audios:
-            best_audio = all_audios[0]
-            audio_url = best_audio.get("baseUrl") or best_audio.get("base_url")
-            audio_backups = best_audio.get("backupUrl") or best_audio.get("backup_url") or []
-            audio_urls = BilibiliParser._normalize_stream_urls(audio_url, audio_backups)
+        video_urls = BilibiliParser._extract_stream_urls(best_video)
+        audio_urls = BilibiliParser._extract_stream_urls(best_audio) if best_audio is not None else []
 
         if video_urls:
             return {"type": "dash", "video_urls": video_urls, "audio_urls": audio_urls}, "ok"
@@ -809,7 +917,7 @@ class BilibiliParser:
     def get_video_duration(video_path: str) -> Optional[float]:
         """获取视频时长（秒）。"""
         try:
-            ffprobe_path = ffmpeg_manager.get_ffprobe_path()
+            ffprobe_path = get_ffmpeg_manager().get_ffprobe_path()
 
             if not ffprobe_path:
                 _logger.warning("未找到 ffprobe，无法获取视频时长")
@@ -819,20 +927,28 @@ class BilibiliParser:
                 ffprobe_path,
                 "-v", "error",
                 "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1",
+                "-of", "json",
                 video_path,
             ]
 
-            result = subprocess.run(cmd, capture_output=True, text=False)
+            result = subprocess.run(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                timeout=30,
+            )
 
             if result.returncode == 0:
-                duration_str = result.stdout.decode("utf-8", errors="replace").strip()
                 try:
-                    duration = float(duration_str)
+                    duration = float(_loads(result.stdout)["format"]["duration"])
                     _logger.debug("Video duration: %.1fs", duration)
                     return duration
-                except ValueError:
-                    _logger.warning("Failed to parse duration: '%s'", duration_str)
+                except (ValueError, TypeError, KeyError):
+                    _logger.warning("Failed to parse duration: '%s'", result.stdout.strip())
                     return None
 
             _logger.warning("ffprobe failed with code: %d", result.returncode)
@@ -842,25 +958,51 @@ class BilibiliParser:
             return None
 
 
+# WBI 签名前需从参数值中剔除的字符 !'()*；字符集固定，用 str.translate 代替正则
+_WBI_STRIP_TT = str.maketrans("", "", "!'()*")
+# 签名参数按键名排序（C 实现的 key 函数，避免每次比较调用 lambda）
+_BY_KEY = operator.itemgetter(0)
+# quote_plus 原样保留的字符；键值只含这些字符时 urlencode 的结果就是简单拼接
+_WBI_QUERY_SAFE_CHARS = frozenset(string.ascii_letters + string.digits + "_.-~")
+
+
+def _wbi_query(items: List[Tuple[str, Any]]) -> str:
+    """拼接待签名的查询串；常见的纯字母数字参数直接 join，需要转义时回退 urlencode。"""
+    parts = []
+    for k, v in items:
+        if not isinstance(v, (str, int)):
+            return urllib.parse.urlencode(items, doseq=True)
+        v = f"{v}"
+        if not (_WBI_QUERY_SAFE_CHARS.issuperset(k) and _WBI_QUERY_SAFE_CHARS.issuperset(v)):
+            return urllib.parse.urlencode(items, doseq=True)
+        parts.append(f"{k}={v}")
+    return "&".join(parts)
+
+
 class BilibiliWbiSigner:
     """WBI 签名工具：自动获取 wbi key 并缓存，生成 w_rid/wts。"""
 
-    _mixin_key_indices: List[int] = [
+    # 混合密钥只取重排后的前 32 位，这里直接保存前 32 个下标
+    _mixin_key_indices32: bytes = bytes((
         46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35,
         27, 43, 5, 49, 33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13,
         37, 48, 7, 16, 24, 55, 40, 61, 26, 17, 0, 1, 60, 51, 30, 4,
         22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11, 36, 20, 34, 44, 52,
-    ]
+    ))[:32]
 
-    _cached_mixin_key: Optional[str] = None
+    # 混合密钥只用于 md5 输入，直接以 ASCII bytes 缓存
+    _cached_mixin_key: Optional[bytes] = None
     _cached_at: float = 0.0
     _cache_ttl_seconds: int = 3600
+    # 并发签名（如批量获取播放地址）时只让一个协程去拉取 nav 接口
+    _refresh_lock: Optional[asyncio.Lock] = None
+    _prefetch_task: Optional["asyncio.Task[None]"] = None
 
     @classmethod
-    def _fetch_wbi_keys(cls) -> Tuple[str, str]:
+    async def _fetch_wbi_keys(cls) -> Tuple[str, str]:
         """从 nav 接口拉取 wbi img/sub key。"""
         url = "https://api.bilibili.com/x/web-interface/nav"
-        data = BilibiliParser._fetch_json(url)
+        data = await BilibiliParser._fetch_json(url)
         wbi_img = (((data or {}).get("data") or {}).get("wbi_img")) or {}
         img_url = wbi_img.get("img_url", "")
         sub_url = wbi_img.get("sub_url", "")
@@ -874,35 +1016,65 @@ class BilibiliWbiSigner:
         return img_key, sub_key
 
     @classmethod
-    def _gen_mixin_key(cls) -> str:
-        now = time.time()
-        if cls._cached_mixin_key and (now - cls._cached_at) < cls._cache_ttl_seconds:
+    async def _gen_mixin_key(cls) -> bytes:
+        if cls._cached_mixin_key and (time.time() - cls._cached_at) < cls._cache_ttl_seconds:
             return cls._cached_mixin_key
-        img_key, sub_key = cls._fetch_wbi_keys()
-        raw = img_key + sub_key
+        if cls._refresh_lock is None:
+            cls._refresh_lock = asyncio.Lock()
+        async with cls._refresh_lock:
+            now = time.time()
+            if cls._cached_mixin_key and (now - cls._cached_at) < cls._cache_ttl_seconds:
+                return cls._cached_mixin_key
+            return await cls._refresh_mixin_key(now)
+
+    @classmethod
+    def prefetch_mixin_key(cls) -> None:
+        """混合密钥已过期时在后台提前刷新，让 nav 请求与短链跳转/view 请求并行。
+
+        签名时 _gen_mixin_key 会在刷新锁上等待这次预取，不会重复请求 nav。
+        """
+        if cls._cached_mixin_key and (time.time() - cls._cached_at) < cls._cache_ttl_seconds:
+            return
+        if cls._prefetch_task is not None and not cls._prefetch_task.done():
+            return
+        cls._prefetch_task = asyncio.create_task(cls._prefetch_mixin_key())
+
+    @classmethod
+    async def _prefetch_mixin_key(cls) -> None:
+        try:
+            await cls._gen_mixin_key()
+        except Exception as e:
+            # 预取失败不影响主流程，签名时会再次尝试并按原逻辑回退
+            _logger.debug("WBI key prefetch failed: %s", e)
+
+    @classmethod
+    async def _refresh_mixin_key(cls, now: float) -> bytes:
+        img_key, sub_key = await cls._fetch_wbi_keys()
+        raw = (img_key + sub_key).encode("ascii")
         if len(raw) < 64:
             _logger.warning("WBI key length insufficient: %d", len(raw))
             raise ValueError("WBI key length insufficient")
-        mixed = "".join(raw[i] for i in cls._mixin_key_indices)[:32]
+        mixed = bytes(raw[i] for i in cls._mixin_key_indices32)
         cls._cached_mixin_key = mixed
         cls._cached_at = now
         return mixed
 
     @classmethod
-    def sign_params(cls, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def sign_params(cls, params: Dict[str, Any]) -> Dict[str, Any]:
         """生成 wts 和 w_rid 并返回带签名的参数副本。"""
-        mixin_key = cls._gen_mixin_key()
-        safe_params: Dict[str, Any] = {}
-        for k, v in params.items():
-            if isinstance(v, str):
-                v2 = re.sub(r"[!'()*]", "", v)
-            else:
-                v2 = v
-            safe_params[k] = v2
+        mixin_key = await cls._gen_mixin_key()
+        safe_params: Dict[str, Any] = {
+            k: v.translate(_WBI_STRIP_TT) if isinstance(v, str) else v
+            for k, v in params.items()
+        }
         wts = int(time.time())
         safe_params["wts"] = wts
-        items = sorted(safe_params.items(), key=lambda x: x[0])
-        query = urllib.parse.urlencode(items, doseq=True)
-        w_rid = hashlib.md5((query + mixin_key).encode("utf-8")).hexdigest()
+        items = list(safe_params.items())
+        items.sort(key=_BY_KEY)
+        query = _wbi_query(items)
+        # urlencode/直接拼接的结果都是 ASCII；分两段 update 省去字符串拼接
+        hasher = hashlib.md5(query.encode("ascii"), usedforsecurity=False)
+        hasher.update(mixin_key)
+        w_rid = hasher.hexdigest()
         safe_params["w_rid"] = w_rid
         return safe_params
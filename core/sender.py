@@ -3,9 +3,11 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import json
 import logging
 import os
+import string
 import urllib.parse
 import urllib.request
 from typing import TYPE_CHECKING, Any
@@ -19,6 +21,32 @@ if TYPE_CHECKING:
 
 _logger = logging.getLogger("plugin.bilibili_video_sender.sender")
 _NAPCAT_VIDEO_LIMIT_BYTES = 100 * 1024 * 1024
+# pathname2url 不会转义的字符；路径只含这些字符时可直接拼接 file URI
+_URI_SAFE_PATH_CHARS = frozenset(string.ascii_letters + string.digits + "_.-~/")
+_session: aiohttp.ClientSession | None = None
+# 适配器在缺少 ID 时可能填入的占位值，按“无 ID”处理
+_EMPTY_ID_VALUES = frozenset(("", "0", "None", "none", "null"))
+# 只接受 access_token 查询参数鉴权的 OneBot 服务端（http://host:port）
+_query_token_servers: set[str] = set()
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """获取 OneBot HTTP API 共享会话（惰性创建），连续发送时复用 keep-alive 连接。"""
+    global _session
+    if _session is None or _session.closed:
+        # OneBot 服务端通常在本机/内网，与原实现一致不读取代理环境变量（trust_env 保持默认 False）
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=32, limit_per_host=8, keepalive_timeout=60),
+        )
+    return _session
+
+
+async def close_onebot_session() -> None:
+    """关闭 OneBot HTTP API 共享会话（插件卸载时调用）。"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
 
 
 async def send_text(
@@ -42,11 +70,13 @@ async def send_video(
     runtime_mode: str,
     message: dict[str, Any],
     api_config: ApiConfig,
+    file_size: int | None = None,
 ) -> bool:
     """发送视频文件。
 
     根据消息类型（私聊/群聊）和运行环境模式选择合适的发送方式。
     优先使用 SDK 的 send.custom，失败时 fallback 到 OneBot HTTP API。
+    调用方已知文件大小时可通过 file_size 传入，跳过发送前的 stat。
     """
     converted_path = convert_windows_to_wsl_path(original_path) if runtime_mode == "wsl" else original_path
 
@@ -54,11 +84,14 @@ async def send_video(
     _logger.debug("Sending video - original path: %s", original_path)
     _logger.debug("Sending video - converted path: %s", converted_path)
 
-    if not os.path.exists(original_path):
-        _logger.error("视频文件不存在: %s", original_path)
-        return False
+    if file_size is None:
+        # 本地临时文件的 stat 只是一次系统调用，直接执行比切换到线程池更快
+        try:
+            file_size = os.path.getsize(original_path)
+        except OSError:
+            _logger.error("视频文件不存在: %s", original_path)
+            return False
 
-    file_size = os.path.getsize(original_path)
     if file_size > _NAPCAT_VIDEO_LIMIT_BYTES:
         _logger.info(
             "Video file exceeds NapCat video limit (%.2f MiB > 100 MiB), uploading as file",
@@ -110,46 +143,20 @@ async def _send_text_via_onebot(
         port = api_config.port
         token = str(api_config.token).strip()
 
-        is_private = _is_private_message(message)
-        if is_private:
-            user_id = _get_user_id(message)
-            if not user_id:
-                _logger.error("私聊消息但无法获取用户 ID")
-                return False
-            api_url = f"http://{host}:{port}/send_private_msg"
-            request_data = {"user_id": user_id, "message": [{"type": "text", "data": {"text": content}}]}
-        else:
-            group_id = _get_group_id(message)
-            if not group_id:
-                _logger.error("群聊消息但无法获取群 ID")
-                return False
-            api_url = f"http://{host}:{port}/send_group_msg"
-            request_data = {"group_id": group_id, "message": [{"type": "text", "data": {"text": content}}]}
+        target = _resolve_target(message)
+        if target is None:
+            return False
+        scope, id_field, id_value = target
+        api_url = f"http://{host}:{port}/send_{scope}_msg"
+        request_data = {id_field: id_value, "message": [{"type": "text", "data": {"text": content}}]}
 
         _logger.debug("OneBot text API: %s", api_url)
 
-        headers = {}
-        if token:
-            headers["Authorization"] = f"Bearer {token}"
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(api_url, json=request_data, headers=headers, timeout=30) as response:
-                if response.status == 200:
-                    return True
-
-                if response.status in (401, 403) and token:
-                    _logger.warning("OneBot auth failed (%d), retrying with access_token", response.status)
-                    retry_url = f"{api_url}?access_token={urllib.parse.quote(token)}"
-                    async with session.post(retry_url, json=request_data, headers=headers, timeout=30) as retry_resp:
-                        if retry_resp.status == 200:
-                            return True
-                        error_text = await retry_resp.text()
-                        _logger.error("Failed to send text (retry): HTTP %d, %s", retry_resp.status, error_text)
-                        return False
-
-                error_text = await response.text()
-                _logger.error("Failed to send text: HTTP %d, %s", response.status, error_text)
-                return False
+        status, body = await _post_onebot_authed(api_url, request_data, token, 30)
+        if status == 200:
+            return True
+        _logger.error("Failed to send text: HTTP %d, %s", status, body)
+        return False
 
     except asyncio.TimeoutError:
         _logger.error("Text sending timeout")
@@ -190,21 +197,12 @@ async def _send_via_onebot(
     token = str(api_config.token).strip()
     file_uri = _as_file_uri(converted_path)
 
-    is_private = _is_private_message(message)
-    if is_private:
-        user_id = _get_user_id(message)
-        if not user_id:
-            _logger.error("Private message but unable to get user ID")
-            return False
-        api_url = f"http://{host}:{port}/send_private_msg"
-        request_data = {"user_id": user_id, "message": [{"type": "video", "data": {"file": file_uri}}]}
-    else:
-        group_id = _get_group_id(message)
-        if not group_id:
-            _logger.error("Group message but unable to get group ID")
-            return False
-        api_url = f"http://{host}:{port}/send_group_msg"
-        request_data = {"group_id": group_id, "message": [{"type": "video", "data": {"file": file_uri}}]}
+    target = _resolve_target(message)
+    if target is None:
+        return False
+    scope, id_field, id_value = target
+    api_url = f"http://{host}:{port}/send_{scope}_msg"
+    request_data = {id_field: id_value, "message": [{"type": "video", "data": {"file": file_uri}}]}
 
     _logger.debug("OneBot video API: %s, data: %s", api_url, request_data)
     return await _send_onebot_request(api_url, request_data, token, 300, "video")
@@ -223,21 +221,12 @@ async def _upload_file_via_onebot(
     file_uri = _as_file_uri(converted_path)
     file_name = os.path.basename(original_path) or "bilibili_video.mp4"
 
-    is_private = _is_private_message(message)
-    if is_private:
-        user_id = _get_user_id(message)
-        if not user_id:
-            _logger.error("Private message but unable to get user ID")
-            return False
-        api_url = f"http://{host}:{port}/upload_private_file"
-        request_data = {"user_id": user_id, "file": file_uri, "name": file_name, "upload_file": True}
-    else:
-        group_id = _get_group_id(message)
-        if not group_id:
-            _logger.error("Group message but unable to get group ID")
-            return False
-        api_url = f"http://{host}:{port}/upload_group_file"
-        request_data = {"group_id": group_id, "file": file_uri, "name": file_name, "upload_file": True}
+    target = _resolve_target(message)
+    if target is None:
+        return False
+    scope, id_field, id_value = target
+    api_url = f"http://{host}:{port}/upload_{scope}_file"
+    request_data = {id_field: id_value, "file": file_uri, "name": file_name, "upload_file": True}
 
     _logger.debug("OneBot file API: %s, data: %s", api_url, request_data)
     return await _send_onebot_request(api_url, request_data, token, 300, "file")
@@ -250,18 +239,9 @@ async def _send_onebot_request(
     timeout: int,
     action_name: str,
 ) -> bool:
-    headers = {}
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-
     try:
-        async with aiohttp.ClientSession() as session:
-            status, body = await _post_onebot(session, api_url, request_data, headers, timeout)
-            if status in (401, 403) and token:
-                _logger.warning("OneBot auth failed (%d), retrying with access_token", status)
-                retry_url = f"{api_url}?access_token={urllib.parse.quote(token)}"
-                status, body = await _post_onebot(session, retry_url, request_data, headers, timeout)
-            return _onebot_result_ok(action_name, status, body)
+        status, body = await _post_onebot_authed(api_url, request_data, token, timeout)
+        return _onebot_result_ok(action_name, status, body)
     except asyncio.TimeoutError:
         _logger.error("OneBot %s sending timeout", action_name)
         return False
@@ -270,6 +250,38 @@ async def _send_onebot_request(
         return False
 
 
+async def _post_onebot_authed(
+    api_url: str,
+    request_data: dict[str, Any],
+    token: str,
+    timeout: int,
+) -> tuple[int, str]:
+    """带鉴权发送 OneBot 请求：先用 Bearer 头，401/403 时改用 access_token 查询参数重试。
+
+    重试成功后记住该服务端只认查询参数，之后的请求直接携带，省去一次必然失败的往返。
+    """
+    headers = {}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+
+    session = _get_session()
+    base_url = api_url.rsplit("/", 1)[0]
+    query_token = bool(token) and base_url in _query_token_servers
+    url = f"{api_url}?access_token={urllib.parse.quote(token)}" if query_token else api_url
+    status, body = await _post_onebot(session, url, request_data, headers, timeout)
+    if status in (401, 403) and token and not query_token:
+        _logger.warning("OneBot auth failed (%d), retrying with access_token", status)
+        retry_url = f"{api_url}?access_token={urllib.parse.quote(token)}"
+        status, body = await _post_onebot(session, retry_url, request_data, headers, timeout)
+        # 只有重试真正成功才能确认服务端认查询参数；5xx 等其他失败不能说明鉴权方式
+        if status == 200:
+            _query_token_servers.add(base_url)
+    elif status in (401, 403) and query_token:
+        # 服务端鉴权配置已变更，下次重新从 Bearer 头开始尝试
+        _query_token_servers.discard(base_url)
+    return status, body
+
+
 async def _post_onebot(
     session: aiohttp.ClientSession,
     api_url: str,
@@ -300,12 +312,34 @@ def _onebot_result_ok(action_name: str, status: int, body: str) -> bool:
     return False
 
 
+@functools.lru_cache(maxsize=256)
 def _as_file_uri(path: str) -> str:
     if path.startswith(("http://", "https://", "file://")):
         return path
+    if _URI_SAFE_PATH_CHARS.issuperset(path):
+        return "file:///" + path.lstrip("/")
     return "file:///" + urllib.request.pathname2url(path).lstrip("/")
 
 
+def _resolve_target(message: dict[str, Any]) -> tuple[str, str, str] | None:
+    """解析 OneBot 发送目标，返回 (scope, id 字段名, id 值)。
+
+    scope 为 "private" 或 "group"，用于拼接 send_{scope}_msg / upload_{scope}_file 接口名。
+    """
+    if _is_private_message(message):
+        user_id = _get_user_id(message)
+        if not user_id:
+            _logger.error("Private message but unable to get user ID")
+            return None
+        return "private", "user_id", user_id
+
+    group_id = _get_group_id(message)
+    if not group_id:
+        _logger.error("Group message but unable to get group ID")
+        return None
+    return "group", "group_id", group_id
+
+
 def _is_private_message(message: dict[str, Any]) -> bool:
     """检测消息是否为私聊消息。
 
@@ -326,7 +360,10 @@ def _get_user_id(message: dict[str, Any]) -> str | None:
     if not user_info:
         return None
     user_id = user_info.get("user_id")
-    return str(user_id) if user_id else None
+    if not user_id:
+        return None
+    user_id = str(user_id)
+    return None if user_id in _EMPTY_ID_VALUES else user_id
 
 
 def _get_group_id(message: dict[str, Any]) -> str | None:
@@ -338,4 +375,7 @@ def _get_group_id(message: dict[str, Any]) -> str | None:
     if not group_info:
         return None
     group_id = group_info.get("group_id")
-    return str(group_id) if group_id else None
+    if not group_id:
+        return None
+    group_id = str(group_id)
+    return None if group_id in _EMPTY_ID_VALUES else group_id
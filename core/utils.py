@@ -1,24 +1,33 @@
 # -*- coding: utf-8 -*-
-"""工具函数：路径转换、进度条、Docker 检测、临时目录管理。"""
+"""工具函数：路径转换、进度条、Docker 检测、临时目录管理、MP4 时长读取。"""
 from __future__ import annotations
 
+import functools
 import logging
 import os
 import platform
 import re
+import struct
 import subprocess
+import sys
 import time
+from typing import BinaryIO, Optional, Tuple
 
 _logger = logging.getLogger("plugin.bilibili_video_sender.utils")
 
+# 文件名中不允许出现的字符（Windows 保留字符与路径分隔符）
+_FILENAME_ILLEGAL_PATTERN = re.compile(r"[\\/:*?\"<>|]+")
+_WINDOWS_DRIVE_PATTERN = re.compile(r"^[a-zA-Z]:")
+
 
 def get_plugin_root_dir() -> str:
     """返回插件根目录，兼容 core 子包内的路径推导。"""
     return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
+@functools.lru_cache(maxsize=1)
 def is_running_in_docker() -> bool:
-    """检测当前进程是否运行在 Docker 容器内。"""
+    """检测当前进程是否运行在 Docker 容器内（进程内缓存）。"""
     if os.path.exists("/.dockerenv"):
         return True
     cgroup_path = "/proc/1/cgroup"
@@ -32,8 +41,9 @@ def is_running_in_docker() -> bool:
         return False
 
 
+@functools.lru_cache(maxsize=4)
 def get_download_temp_dir(linux_temp_dir: str = "") -> str:
-    """获取下载临时目录：优先使用共享目录，确保跨进程访问。"""
+    """获取下载临时目录：优先使用共享目录，确保跨进程访问（按配置值缓存）。"""
     if is_running_in_docker():
         return "/MaiMBot/data/tmp"
 
@@ -77,7 +87,7 @@ def convert_windows_to_wsl_path(windows_path: str) -> str:
         except (subprocess.SubprocessError, FileNotFoundError):
             pass
 
-        if re.match(r"^[a-zA-Z]:", windows_path):
+        if _WINDOWS_DRIVE_PATTERN.match(windows_path):
             drive = windows_path[0].lower()
             path = windows_path[2:].replace("\\", "/").lstrip("/")
             return f"/mnt/{drive}/{path}"
@@ -96,11 +106,22 @@ class ProgressBar:
         self.current_size = 0
         self.last_update = 0.0
         self.update_interval = 0.1
+        self._last_filled = -1
+        # 预先生成各填充长度的进度条，update 时直接查表
+        # ASCII-safe for Windows GBK console
+        self._bars = ["#" * i + "-" * (bar_length - i) for i in range(bar_length + 1)]
+        # 输出被重定向（插件子进程的 stdout 通常接到宿主日志）时 \r 刷新无意义，只在 finish 时输出最终一行
+        try:
+            self._interactive = sys.stdout.isatty()
+        except (AttributeError, ValueError):
+            self._interactive = False
 
     def update(self, downloaded: int) -> None:
         """更新进度。"""
         self.current_size = downloaded
-        current_time = time.time()
+        if not self._interactive:
+            return
+        current_time = time.monotonic()
 
         if current_time - self.last_update < self.update_interval:
             return
@@ -108,28 +129,90 @@ class ProgressBar:
         self.last_update = current_time
 
         if self.total_size > 0:
-            percentage = (downloaded / self.total_size) * 100
+            filled_length = min(self.bar_length, self.bar_length * downloaded // self.total_size)
         else:
-            percentage = 0
-
-        filled_length = int(self.bar_length * downloaded // self.total_size) if self.total_size > 0 else 0
-        bar = "#" * filled_length + "-" * (self.bar_length - filled_length)  # ASCII-safe for Windows GBK console
+            filled_length = 0
+        if filled_length == self._last_filled:
+            return
+        self._last_filled = filled_length
 
+        percentage = (downloaded / self.total_size) * 100 if self.total_size > 0 else 0
         downloaded_mb = downloaded / (1024 * 1024)
         total_mb = self.total_size / (1024 * 1024) if self.total_size > 0 else 0
 
         print(
-            f"\r{self.description}: [{bar}] {percentage:5.1f}% ({downloaded_mb:6.1f}MB/{total_mb:6.1f}MB)",
+            f"\r{self.description}: [{self._bars[filled_length]}] {percentage:5.1f}% ({downloaded_mb:6.1f}MB/{total_mb:6.1f}MB)",
             end="",
             flush=True,
         )
 
     def finish(self) -> None:
         """完成进度条显示。"""
+        # 强制绘制最终状态，不受节流、重复绘制判断与非交互模式影响
+        self.last_update = float("-inf")
+        self._last_filled = -1
+        self._interactive = True
         self.update(self.total_size)
         print()
 
 
 def sanitize_filename(name: str) -> str:
     """清理文件名，移除非法字符。"""
-    return re.sub(r"[\\/:*?\"<>|]+", "_", name).strip() or "bilibili_video"
+    return _FILENAME_ILLEGAL_PATTERN.sub("_", name).strip() or "bilibili_video"
+
+
+def _find_mp4_box(f: BinaryIO, start: int, end: int, box_type: bytes) -> Optional[Tuple[int, int]]:
+    """在 [start, end) 范围内按顺序跳读 MP4 box 头，返回目标 box 的 (内容起始偏移, 结束偏移)。"""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(16)
+        if len(header) < 8:
+            return None
+        size, kind = struct.unpack_from(">I4s", header)
+        header_size = 8
+        if size == 1:
+            if len(header) < 16:
+                return None
+            size = struct.unpack_from(">Q", header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - pos
+        if size < header_size:
+            return None
+        if kind == box_type:
+            return pos + header_size, pos + size
+        pos += size
+    return None
+
+
+def read_mp4_duration(path: str) -> Optional[float]:
+    """直接从 MP4 的 moov/mvhd 读取时长（秒）。
+
+    只读取少量 box 头（mdat 等大块数据直接跳过），无需启动 ffprobe 进程；
+    非 MP4、时长缺失或结构异常时返回 None，由调用方回退到 ffprobe。
+    """
+    try:
+        with open(path, "rb") as f:
+            file_size = f.seek(0, os.SEEK_END)
+            moov = _find_mp4_box(f, 0, file_size, b"moov")
+            if moov is None:
+                return None
+            mvhd = _find_mp4_box(f, moov[0], moov[1], b"mvhd")
+            if mvhd is None:
+                return None
+            f.seek(mvhd[0])
+            data = f.read(32)
+        if data[0] == 1:
+            # version 1: version/flags(4) + creation(8) + modification(8) + timescale(4) + duration(8)
+            timescale, duration = struct.unpack_from(">IQ", data, 20)
+            unknown = 0xFFFFFFFFFFFFFFFF
+        else:
+            # version 0: version/flags(4) + creation(4) + modification(4) + timescale(4) + duration(4)
+            timescale, duration = struct.unpack_from(">II", data, 12)
+            unknown = 0xFFFFFFFF
+    except (OSError, IndexError, struct.error):
+        return None
+    if not timescale or not duration or duration == unknown:
+        return None
+    return duration / timescale
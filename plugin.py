@@ -5,7 +5,7 @@ from __future__ import annotations
 
 import asyncio
 import os
-import re
+import random
 from typing import Any
 
 from maibot_sdk import (
@@ -25,14 +25,19 @@ from .core.auth import (
     normalize_credentials,
     save_auth_config,
 )
-from .core.downloader import download_video
-from .core.ffmpeg import VideoCompressor, ffmpeg_manager
-from .core.parser import BilibiliParser, BilibiliVideoInfo
-from .core.sender import send_emoji_reaction, send_text, send_video
-from .core.utils import ensure_shared_file_permissions, get_download_temp_dir
+from .core.downloader import close_download_connections, download_video
+from .core.ffmpeg import VideoCompressor, get_ffmpeg_manager
+from .core.parser import BilibiliParser, BilibiliVideoInfo, BilibiliWbiSigner, close_api_session
+from .core.sender import close_onebot_session, send_emoji_reaction, send_text, send_video
+from .core.utils import ensure_shared_file_permissions, get_download_temp_dir, read_mp4_duration
 
 # ── 配置模型 ─────────────────────────────────────────────────
 
+# qn 字段说明中的可选值列表，由解析器的清晰度表生成，避免两处手写表不同步
+_QN_DESCRIPTION = "清晰度设置(qn)，0 为自动（登录默认 720P，未登录默认 480P）；可选值：" + "、".join(
+    f"{qn}={name}" for qn, name in BilibiliParser.QN_INFO.items()
+)
+
 
 def _ui(label: str, hint: str, order: int, **extra: Any) -> dict[str, Any]:
     """构造 WebUI 字段元数据。"""
@@ -114,7 +119,7 @@ class BilibiliConfig(PluginConfigBase):
     )
     qn: int = Field(
         default=0,
-        description="清晰度设置(qn)，0 为自动（登录默认 720P，未登录默认 480P）",
+        description=_QN_DESCRIPTION,
         ge=0,
     )
     qn_strict: bool = Field(default=False, description="是否严格按 qn 选择清晰度")
@@ -200,6 +205,15 @@ class FFmpegConfig(PluginConfigBase):
             3,
         ),
     )
+    direct_http_input: bool = Field(
+        default=False,
+        description="DASH 视频由 FFmpeg 直接读取 CDN 流合并，省去临时分段文件（不使用多连接分段下载，失败时自动回退）",
+        json_schema_extra=_ui(
+            "FFmpeg 直接读取流",
+            "DASH 视频由 FFmpeg 直接读取 CDN 流合并，省去临时分段文件（不使用多连接分段下载，失败时自动回退）",
+            4,
+        ),
+    )
 
 
 class EnvironmentConfig(PluginConfigBase):
@@ -259,7 +273,7 @@ class PluginMetaConfig(PluginConfigBase):
     __ui_label__ = "插件设置"
     __ui_order__ = 0
 
-    config_version: str = Field(default="2.0.9", description="配置版本（勿手动修改）")
+    config_version: str = Field(default="2.0.11", description="配置版本（勿手动修改）")
     enabled: bool = Field(default=True, description="是否启用插件")
 
 
@@ -322,8 +336,7 @@ class BilibiliVideoSenderPlugin(MaiBotPlugin):
             self.ctx.logger.warning(
                 "config.toml [auth] 未配置 SESSDATA，将使用游客模式"
             )
-        loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, ffmpeg_manager.check_ffmpeg_availability)
+        await get_ffmpeg_manager().check_ffmpeg_availability_async()
         if (
             self.config.bilibili.enable_cookie_refresh
             and not BilibiliAuthRefresher.cryptography_available()
@@ -349,6 +362,9 @@ class BilibiliVideoSenderPlugin(MaiBotPlugin):
         """插件卸载：清理临时文件。"""
         self.ctx.logger.info("Bilibili video sender plugin unloading...")
         await self._stop_auth_refresh_task()
+        await close_api_session()
+        await close_onebot_session()
+        close_download_connections()
         tmp_dir = get_download_temp_dir(self.config.environment.linux_temp_dir)
         try:
             for f in os.listdir(tmp_dir):
@@ -369,6 +385,12 @@ class BilibiliVideoSenderPlugin(MaiBotPlugin):
         if scope == CONFIG_RELOAD_SCOPE_SELF:
             self.ctx.logger.info("Plugin config updated to version %s", version)
             self._auth_credentials = self._credentials_from_config()
+            # 之前未找到 FFmpeg 时重新查找，运行中补装 FFmpeg 后重载配置即可生效，无需重启
+            manager = get_ffmpeg_manager()
+            availability = await manager.check_ffmpeg_availability_async()
+            if not availability.get("ffmpeg_available"):
+                manager.clear_path_cache()
+                await manager.check_ffmpeg_availability_async()
             if self.config.bilibili.enable_cookie_refresh:
                 self._start_auth_refresh_task()
             else:
@@ -650,7 +672,9 @@ class BilibiliVideoSenderPlugin(MaiBotPlugin):
     async def handle_bilibili_link(self, **kwargs) -> dict[str, Any] | None:
         """在消息路由到 maisaka 前自动检测 B站链接并处理。"""
         message: dict = kwargs.get("message", {}) or {}
-        config = self.config.bilibili
+        # 每条消息都会经过该 hook：本次处理只读取一次配置对象，热更新不会让同一条消息前后读到不同配置
+        plugin_config = self.config
+        config = plugin_config.bilibili
 
         # SDK MessageDict 字段：processed_plain_text 为纯文本，raw_message 为消息段列表，session_id 为会话标识
         processed_plain_text: str = message.get("processed_plain_text", "") or ""
@@ -666,23 +690,23 @@ class BilibiliVideoSenderPlugin(MaiBotPlugin):
         # 直接搜索会误触发被引用消息里的链接。
         # raw_message 中 type=="reply" 的段携带被引用内容，type=="text" 的段才是新消息正文。
         # 检测到 reply 段后，只拼接 text 段作为搜索源。
-        has_reply = any(
-            isinstance(seg, dict) and seg.get("type") == "reply"
-            for seg in message_segments
-        )
-        if has_reply:
-            effective_text = " ".join(
-                str(seg.get("data", ""))
-                for seg in message_segments
-                if isinstance(seg, dict) and seg.get("type") == "text"
-            )
-        else:
-            effective_text = processed_plain_text
+        # 单次遍历同时检测 reply 段并收集 text 段，避免引用消息时重复扫描消息段。
+        has_reply = False
+        text_parts: list[str] = []
+        for seg in message_segments:
+            if not isinstance(seg, dict):
+                continue
+            seg_type = seg.get("type")
+            if seg_type == "text":
+                text_parts.append(str(seg.get("data", "")))
+            elif seg_type == "reply":
+                has_reply = True
+        effective_text = " ".join(text_parts) if has_reply else processed_plain_text
 
         url = ""
         parse_source = effective_text
 
-        if self.config.parser.enable_miniapp_card:
+        if plugin_config.parser.enable_miniapp_card:
             miniapp_url = self._extract_miniapp_bilibili_url(message)
             if miniapp_url:
                 parse_source = miniapp_url
@@ -789,13 +813,24 @@ class BilibiliVideoSenderPlugin(MaiBotPlugin):
         message: dict[str, Any],
     ) -> None:
         """完整的视频处理流水线（在后台 task 中运行）。"""
-        config = self.config.bilibili
+        # 任务开始时一次性取出所需配置，整个流水线使用同一份快照（热重载不会导致中途配置变化）
+        plugin_config = self.config
+        config = plugin_config.bilibili
+        api_config = plugin_config.api
+        env_config = plugin_config.environment
+        direct_http_input = plugin_config.ffmpeg.direct_http_input
+        max_duration = config.max_video_duration if config.enable_duration_limit else None
+        notify_task: asyncio.Task[Any] | None = None
         try:
             loop = asyncio.get_running_loop()
+            # 压缩器（编码器选择）与 B站 API 解析并行准备，下载前取用
+            compressor_future = loop.run_in_executor(
+                None, self._build_compressor, config, plugin_config.ffmpeg
+            )
             credentials, auth_notice = await self._ensure_auth_ready()
             if auth_notice:
                 await send_text(
-                    self.ctx, auth_notice, session_id, message, self.config.api
+                    self.ctx, auth_notice, session_id, message, api_config
                 )
 
             # Step 1: 解析视频信息 + 获取播放地址（阻塞）
@@ -806,9 +841,7 @@ class BilibiliVideoSenderPlugin(MaiBotPlugin):
                 status,
                 error_msg,
                 updated_credentials,
-            ) = await loop.run_in_executor(
-                None, self._resolve_video_sync, url, fallback_qn, credentials
-            )
+            ) = await self._resolve_video(url, fallback_qn, credentials)
 
             if status == "unsupported_type":
                 self.ctx.logger.info("Ignoring unsupported Bilibili link type")
@@ -820,7 +853,7 @@ class BilibiliVideoSenderPlugin(MaiBotPlugin):
                     error_msg or "未能解析该视频链接，请稍后重试。",
                     session_id,
                     message,
-                    self.config.api,
+                    api_config,
                 )
                 return
 
@@ -832,100 +865,99 @@ class BilibiliVideoSenderPlugin(MaiBotPlugin):
                 self.ctx.logger.info("B站响应头更新的 Cookie 已写入 config.toml [auth]")
 
             # Step 2: 时长校验
-            if config.enable_duration_limit and info.duration is not None:
-                if info.duration > config.max_video_duration:
-                    duration_min = int(info.duration // 60)
-                    duration_sec = int(info.duration % 60)
-                    max_min = int(config.max_video_duration // 60)
-                    max_sec = int(config.max_video_duration % 60)
-                    await send_text(
-                        self.ctx,
-                        f"视频时长超过限制：视频时长为 {duration_min}分{duration_sec}秒，"
-                        f"最大允许时长为 {max_min}分{max_sec}秒。",
-                        session_id,
-                        message,
-                        self.config.api,
-                    )
-                    return
+            limit_msg = self._duration_limit_message(info.duration, max_duration, "。")
+            if limit_msg:
+                await send_text(self.ctx, limit_msg, session_id, message, api_config)
+                return
 
-            # Step 3: 通知用户解析成功
+            # Step 3: 通知用户解析成功（与下载并行，消息往返不推迟下载开始）
             use_emoji = (
                 config.success_notification_mode == "emoji"
                 and not self._is_private_message(message)
             )
             if use_emoji:
                 msg_id = message.get("message_id", "")
-                await send_emoji_reaction(
-                    msg_id, config.reaction_emoji_id, self.config.api
+                notify = send_emoji_reaction(
+                    msg_id, config.reaction_emoji_id, api_config
                 )
             else:
                 success_msg = "解析成功"
                 if selected_qn_name:
                     success_msg = f"解析成功，已选择：{selected_qn_name}"
-                await send_text(
-                    self.ctx, success_msg, session_id, message, self.config.api
+                notify = send_text(
+                    self.ctx, success_msg, session_id, message, api_config
                 )
+            notify_task = asyncio.create_task(notify)
 
-            # Step 4: 下载 + 合并（阻塞）
-            temp_path = await loop.run_in_executor(
+            # Step 4: 下载 + 合并（阻塞）；DASH 分段超限时直接由分段压缩输出
+            compressor = await compressor_future
+            # API 未给出时长时下载后还需 ffprobe 校验，此时先不压缩，避免为随后被拒绝的视频白白编码
+            inline_compressor = (
+                compressor if max_duration is None or info.duration is not None else None
+            )
+            temp_path, already_compressed = await loop.run_in_executor(
                 None,
                 download_video,
                 info,
                 sources,
                 credentials,
-                self.config.environment.linux_temp_dir,
+                env_config.linux_temp_dir,
+                direct_http_input,
+                inline_compressor,
+                config.max_video_size_mb,
+                config.compression_quality,
             )
+            # 后续消息（失败提示、视频）须排在成功通知之后
+            await notify_task
             if not temp_path:
                 await send_text(
                     self.ctx,
                     "视频下载失败，请稍后重试。",
                     session_id,
                     message,
-                    self.config.api,
+                    api_config,
                 )
                 return
 
             self.ctx.logger.info("Video download completed: %s", temp_path)
 
-            # Step 5: 时长二次校验（使用 ffprobe）
-            video_duration = await loop.run_in_executor(
-                None, BilibiliParser.get_video_duration, temp_path
-            )
-            if config.enable_duration_limit and video_duration is not None:
-                if video_duration > config.max_video_duration:
-                    duration_min = int(video_duration // 60)
-                    duration_sec = int(video_duration % 60)
-                    max_min = int(config.max_video_duration // 60)
-                    max_sec = int(config.max_video_duration % 60)
-                    await send_text(
-                        self.ctx,
-                        f"视频时长超过限制：视频时长为 {duration_min}分{duration_sec}秒，"
-                        f"最大允许时长为 {max_min}分{max_sec}秒，已拒绝发送。",
-                        session_id,
-                        message,
-                        self.config.api,
-                    )
-                    await loop.run_in_executor(
-                        None,
-                        lambda: os.remove(temp_path)
-                        if os.path.exists(temp_path)
-                        else None,
+            # Step 5: 时长二次校验（优先直接读取 MP4 头部，失败再使用 ffprobe；未启用时长限制则跳过）
+            if max_duration is not None:
+                video_duration = read_mp4_duration(temp_path)
+                if video_duration is None:
+                    video_duration = await loop.run_in_executor(
+                        None, BilibiliParser.get_video_duration, temp_path
                     )
+                limit_msg = self._duration_limit_message(video_duration, max_duration, "，已拒绝发送。")
+                if limit_msg:
+                    await send_text(self.ctx, limit_msg, session_id, message, api_config)
+                    self._remove_file(temp_path)
                     return
 
-            # Step 6: 文件大小检查 + 压缩（阻塞）
-            final_path = await loop.run_in_executor(
-                None, self._maybe_compress, temp_path
-            )
-            await loop.run_in_executor(None, ensure_shared_file_permissions, final_path)
+            # Step 6: 文件大小检查 + 压缩（阻塞）；stat/chmod 是本地单次系统调用，直接执行比切换到线程池更快
+            try:
+                final_size: int | None = os.path.getsize(temp_path)
+            except OSError:
+                final_size = None
+            if (
+                final_size is not None
+                and not already_compressed
+                and compressor is not None
+                and final_size > config.max_video_size_mb * 1024 * 1024
+            ):
+                final_size = await loop.run_in_executor(
+                    None, self._compress_in_place, temp_path, compressor, final_size, config
+                )
+            ensure_shared_file_permissions(temp_path)
 
             # Step 7: 发送
             sent_ok = await send_video(
                 self.ctx,
-                final_path,
-                self.config.environment.runtime_mode,
+                temp_path,
+                env_config.runtime_mode,
                 message,
-                self.config.api,
+                api_config,
+                file_size=final_size,
             )
             if not sent_ok:
                 await send_text(
@@ -933,32 +965,40 @@ class BilibiliVideoSenderPlugin(MaiBotPlugin):
                     "视频解析成功，但发送失败。请检查网络连接和API配置。",
                     session_id,
                     message,
-                    self.config.api,
+                    api_config,
                 )
             else:
                 self.ctx.logger.info("Video file sent successfully")
 
             # Step 8: 清理
-            await loop.run_in_executor(None, self._cleanup_files, final_path, temp_path)
+            self._remove_file(temp_path)
 
             self.ctx.logger.info("Bilibili video processing completed")
 
         except Exception:
             self.ctx.logger.error("视频处理异常", exc_info=True)
+            if notify_task is not None:
+                # 错误提示同样须排在成功通知之后；通知自身失败不影响发送错误提示
+                try:
+                    await notify_task
+                except Exception:
+                    pass
             try:
                 await send_text(
                     self.ctx,
                     "视频处理过程中发生错误，请稍后重试。",
                     session_id,
                     message,
-                    self.config.api,
+                    api_config,
                 )
             except Exception:
                 pass
+        finally:
+            # 任务被取消（如插件卸载）时不留下无人等待的通知 task
+            if notify_task is not None and not notify_task.done():
+                notify_task.cancel()
 
-    # ── 同步辅助方法（在线程池中运行） ──────────────────────
-
-    def _resolve_video_sync(
+    async def _resolve_video(
         self,
         url: str,
         fallback_qn: int | None,
@@ -971,9 +1011,12 @@ class BilibiliVideoSenderPlugin(MaiBotPlugin):
         str | None,
         dict[str, Any] | None,
     ]:
-        """同步解析视频链接（阻塞，在线程池中运行）。"""
+        """解析视频链接并获取播放地址（B站 API 通过共享 aiohttp 会话请求）。"""
+        # WBI 密钥过期时提前在后台刷新，与下面的短链跳转、view 请求并行
+        BilibiliWbiSigner.prefetch_mixin_key()
+
         # 预热 FFmpeg 缓存（check_ffmpeg_availability 幂等，结果已内部缓存）
-        ffmpeg_manager.check_ffmpeg_availability()
+        await get_ffmpeg_manager().check_ffmpeg_availability_async()
 
         effective_credentials = normalize_credentials(credentials)
         config_opts = {
@@ -994,27 +1037,27 @@ class BilibiliVideoSenderPlugin(MaiBotPlugin):
         for r in validation_result["recommendations"]:
             self.ctx.logger.debug("配置建议: %s", r)
 
+        # url 来自 find_first_bilibili_url，已去除尾部标点；只有跳转得到的新地址需要再清理
         target_url = url
 
         # 短链接解析（带重试）
-        if "b23.tv" in target_url:
+        if "b23.tv" in target_url.lower():
             for attempt in range(3):
                 try:
-                    target_url = BilibiliParser._follow_redirect(target_url)
+                    target_url = BilibiliParser._sanitize_url(
+                        await BilibiliParser._follow_redirect(target_url)
+                    )
                     break
                 except Exception:
                     if attempt < 2:
-                        time_sleep = __import__("time").sleep
-                        time_sleep(attempt + 1)
+                        await asyncio.sleep(self._retry_delay(attempt))
                     else:
                         # 使用原始 URL 继续
                         pass
 
-        target_url = BilibiliParser._sanitize_url(target_url)
-
         # 检查是否为支持的视频链接
         has_bv = BilibiliParser._extract_bvid(target_url) is not None
-        has_av = re.search(r"/video/av\d+", target_url) is not None
+        has_av = BilibiliParser.AV_ID_PATTERN.search(target_url) is not None
         if not (has_bv or has_av):
             return None, None, None, "unsupported_type", None, None
 
@@ -1029,18 +1072,18 @@ class BilibiliVideoSenderPlugin(MaiBotPlugin):
         info = None
         for attempt in range(3):
             try:
-                info = BilibiliParser.get_view_info_by_url(target_url, config_opts)
+                info = await BilibiliParser.get_view_info_by_url(target_url, config_opts)
                 if info:
                     break
             except Exception:
                 pass
             if attempt < 2:
-                __import__("time").sleep(attempt + 1)
+                await asyncio.sleep(self._retry_delay(attempt))
 
         if not info:
             return None, None, None, "error", "未能解析该视频链接，请稍后重试。", None
 
-        sources, status = BilibiliParser.get_play_urls(info.aid, info.cid, config_opts)
+        sources, status = await BilibiliParser.get_play_urls(info.aid, info.cid, config_opts)
         if not sources:
             return info, None, None, "error", f"解析失败：{status}", None
 
@@ -1050,63 +1093,91 @@ class BilibiliVideoSenderPlugin(MaiBotPlugin):
         selected_qn_name = config_opts.get("selected_qn_name")
         return info, sources, selected_qn_name, status, None, updated_credentials
 
-    def _maybe_compress(self, temp_path: str) -> str:
-        """按需压缩视频（同步，在线程池中运行）。"""
-        config = self.config.bilibili
-        ffmpeg_cfg = self.config.ffmpeg
+    @staticmethod
+    def _retry_delay(attempt: int) -> float:
+        """B站请求重试间隔：指数退避（0.5s、1s…）加随机抖动，避免多个会话同时重试。"""
+        return 0.5 * (2 ** attempt) + random.uniform(0, 0.5)
 
-        try:
-            video_size_mb = os.path.getsize(temp_path) / (1024 * 1024)
-        except Exception:
-            return temp_path
+    # ── 同步辅助方法（在线程池中运行） ──────────────────────
 
-        if (
-            video_size_mb <= config.max_video_size_mb
-            or not config.enable_video_compression
-        ):
-            return temp_path
+    def _build_compressor(
+        self, config: BilibiliConfig, ffmpeg_cfg: FFmpegConfig
+    ) -> VideoCompressor | None:
+        """按任务配置快照创建压缩器（同步，在线程池中运行）；未启用压缩或 FFmpeg 不可用时返回 None。
 
-        ffmpeg_info = ffmpeg_manager.check_ffmpeg_availability()
-        if not ffmpeg_info["ffmpeg_available"]:
-            return temp_path
+        在任务开始时提前调度，任务可能在取用前就结束，因此这里不向外抛出异常。
+        """
+        if not config.enable_video_compression:
+            return None
+
+        try:
+            ffmpeg_info = get_ffmpeg_manager().check_ffmpeg_availability()
+            if not ffmpeg_info["ffmpeg_available"]:
+                return None
+
+            return VideoCompressor(
+                ffmpeg_path=ffmpeg_info["ffmpeg_path"],
+                enable_hardware=ffmpeg_cfg.enable_hardware_acceleration,
+                force_encoder=ffmpeg_cfg.force_encoder,
+                encoder_priority=ffmpeg_cfg.encoder_priority,
+            )
+        except Exception:
+            self.ctx.logger.warning("视频压缩器初始化失败，本次不压缩", exc_info=True)
+            return None
 
+    def _compress_in_place(
+        self,
+        temp_path: str,
+        compressor: VideoCompressor,
+        video_size: int,
+        config: BilibiliConfig,
+    ) -> int:
+        """压缩超限视频（同步，在线程池中运行）。
+
+        压缩结果原子替换回 temp_path，整个流程只有一个待发送/清理的文件；
+        返回其字节大小（供发送时判断是否超出视频上限，省去再次 stat）。
+        """
         base_name, _ = os.path.splitext(temp_path)
         compressed_path = f"{base_name}_compressed.mp4"
 
-        compressor = VideoCompressor(
-            ffmpeg_path=ffmpeg_info["ffmpeg_path"],
-            enable_hardware=ffmpeg_cfg.enable_hardware_acceleration,
-            force_encoder=ffmpeg_cfg.force_encoder,
-            encoder_priority=ffmpeg_cfg.encoder_priority,
-        )
-
         if compressor.compress_video(
             temp_path,
             compressed_path,
             config.max_video_size_mb,
             config.compression_quality,
         ):
-            compressed_size_mb = os.path.getsize(compressed_path) / (1024 * 1024)
+            compressed_size = os.path.getsize(compressed_path)
             self.ctx.logger.info(
-                "Video compression: %.2fMB -> %.2fMB", video_size_mb, compressed_size_mb
+                "Video compression: %.2fMB -> %.2fMB",
+                video_size / (1024 * 1024),
+                compressed_size / (1024 * 1024),
             )
-            try:
-                os.remove(temp_path)
-            except Exception:
-                pass
-            return compressed_path
+            os.replace(compressed_path, temp_path)
+            return compressed_size
 
-        return temp_path
+        self._remove_file(compressed_path)
+        return video_size
 
     @staticmethod
-    def _cleanup_files(final_path: str, temp_path: str) -> None:
-        """清理临时文件（同步，在线程池中运行）。"""
+    def _duration_limit_message(
+        duration: float | None, max_duration: float | None, suffix: str
+    ) -> str | None:
+        """时长超过限制时返回提示文本，未超限、未启用限制或时长未知时返回 None。"""
+        if max_duration is None or duration is None or duration <= max_duration:
+            return None
+        duration_min, duration_sec = divmod(int(duration), 60)
+        max_min, max_sec = divmod(int(max_duration), 60)
+        return (
+            f"视频时长超过限制：视频时长为 {duration_min}分{duration_sec}秒，"
+            f"最大允许时长为 {max_min}分{max_sec}秒{suffix}"
+        )
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        """删除临时文件，文件不存在时忽略。"""
         try:
-            if os.path.exists(final_path):
-                os.remove(final_path)
-            if final_path != temp_path and os.path.exists(temp_path):
-                os.remove(temp_path)
-        except Exception:
+            os.remove(path)
+        except OSError:
             pass
 
     # ── 消息工具方法 ──────────────────────────────────────
@@ -1128,6 +1199,11 @@ class BilibiliVideoSenderPlugin(MaiBotPlugin):
         if message.get("is_at", False) or message.get("is_mentioned", False):
             return True
 
+        # 未读取到机器人 QQ 号时，消息段中的 @ 无法比对，直接跳过遍历
+        bot_qq = self._bot_qq
+        if not bot_qq:
+            return False
+
         # 从结构化消息段兜底（SDK 2.0 消息段均为 dict，@ 类型为 "at"）
         for seg in segments:
             if not isinstance(seg, dict):
@@ -1137,8 +1213,9 @@ class BilibiliVideoSenderPlugin(MaiBotPlugin):
             seg_data = seg.get("data", {})
             if not isinstance(seg_data, dict):
                 continue
-            target_user_id = str(seg_data.get("target_user_id", "") or "").strip()
-            if self._bot_qq and target_user_id == self._bot_qq:
+            # 适配器通常直接给出字符串 QQ 号，命中时省去 str()/strip() 规范化
+            target_user_id = seg_data.get("target_user_id")
+            if target_user_id == bot_qq or str(target_user_id or "").strip() == bot_qq:
                 return True
 
         return False